@@ -0,0 +1,28 @@
+"""Production entrypoint: `python -m backend`.
+
+Uses uvloop/httptools when installed (uvicorn[standard]) and WEB_CONCURRENCY worker processes.
+"""
+import importlib.util
+import os
+
+import uvicorn
+
+
+def _pick(module: str, preferred: str, fallback: str) -> str:
+	return preferred if importlib.util.find_spec(module) is not None else fallback
+
+
+def main() -> None:
+	uvicorn.run(
+		"backend.main:app",
+		host=os.getenv("HOST", "0.0.0.0"),
+		port=int(os.getenv("PORT", "8000")),
+		loop=_pick("uvloop", "uvloop", "asyncio"),
+		http=_pick("httptools", "httptools", "h11"),
+		# Job status, predict and task caches are per process; scale workers only behind sticky routing
+		workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+	)
+
+
+if __name__ == "__main__":
+	main()
@@ -1,11 +1,18 @@
-from fastapi import FastAPI, UploadFile, File, Form, Request
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, BinaryIO, Tuple
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from collections import OrderedDict, deque
+import asyncio
+import multiprocessing
 import threading
-import uuid
+import itertools
+import time
+from functools import lru_cache
 import io
-from PIL import Image
+import hashlib
 import base64
 import os
 from datetime import datetime
@@ -16,15 +23,18 @@ from .services.adapters import InferenceRouter
 from .services.storage import DatabaseService
 from .services.rag import RagService
 from .services.agent import AgentOrchestrator
-from .services.sdlc_builder import SDLCBuilder
+from .services.sdlc_builder import run_build
 from .services.classify import classify_prompt, pick_tool
-from .services.security import scrub_files, append_audit
-import json
+from .services.security import scrub_files, append_audit, scrub_secrets_in_text, scrub_secrets_in_texts
+from .services.batcher import MicroBatcher, WriteBehindQueue
+from .services.clock import utc_iso
+from .services.semantic_cache import SemanticCache
+from .services.file_writer import write_file, write_files
+import orjson
 import pathlib
-import subprocess
 import shlex
 
-app = FastAPI(title="Autonomous SDLC Agent API")
+app = FastAPI(title="Autonomous SDLC Agent API", default_response_class=ORJSONResponse)
 logger = logging.getLogger("uvicorn.error")
 
 
@@ -37,9 +47,11 @@ def api_index() -> Dict[str, Any]:
             {"method": "GET", "path": "/", "desc": "API index"},
             {"method": "GET", "path": "/health", "desc": "Health check"},
             {"method": "GET", "path": "/providers", "desc": "Provider availability"},
+            {"method": "POST", "path": "/providers/refresh", "desc": "Re-probe provider availability"},
             {"method": "GET", "path": "/logs", "desc": "Recent logs"},
             {"method": "POST", "path": "/predict", "desc": "Image classification demo"},
             {"method": "POST", "path": "/task", "desc": "Generic text/code task"},
+            {"method": "POST", "path": "/task/stream", "desc": "Generic text task, streamed as generated"},
             {"method": "POST", "path": "/build", "desc": "High-level build orchestrator"},
             {"method": "POST", "path": "/sdlc/build", "desc": "Async full SDLC builder"},
             {"method": "GET", "path": "/sdlc/status", "desc": "Latest or specific job status"},
@@ -83,11 +95,85 @@ router = InferenceRouter()
 db = DatabaseService()
 rag = RagService(db)
 agent = AgentOrchestrator()
-builder = SDLCBuilder(fast_mode=bool(os.getenv("SDLC_FAST", "1") in ("1", "true", "True")))
+_SDLC_FAST_MODE = bool(os.getenv("SDLC_FAST", "1") in ("1", "true", "True"))
+
+# Bounded pool for blocking work (PIL decode, provider calls, DB/RAG writes) offloaded from the event loop
+_EXECUTOR = ThreadPoolExecutor(max_workers=(os.cpu_count() or 1) * 2, thread_name_prefix="api-io")
+
+# Coalesce concurrent /predict classifications into router.classify_image_bytes_batch calls
+_PREDICT_BATCHER = MicroBatcher(
+	router.classify_image_bytes_batch,
+	max_batch=int(os.getenv("PREDICT_MAX_BATCH", "16")),
+	max_latency_ms=float(os.getenv("PREDICT_MAX_LATENCY_MS", "10")),
+)
+
+# Image BLOBs are persisted off the request path in batched transactions
+def _save_image_row(row: Tuple[int, bytes, str]) -> None:
+	image_id, content, filename = row
+	db.save_image(content, filename, image_id=image_id)
+
+
+def _drop_image_row(row: Tuple[int, bytes, str], error: Exception) -> None:
+	# The BLOB will never exist: don't leave predictions pointing at it
+	removed = db.delete_predictions_for_image(row[0])
+	logger.error("image %s could not be stored (%s); removed %d prediction(s)", row[0], error, removed)
+
+
+_IMAGE_WRITER = WriteBehindQueue(
+	db.save_images,
+	maxsize=int(os.getenv("IMAGE_WRITE_QUEUE_MAX", "1024")),
+	name="image-writer",
+	item_fn=_save_image_row,
+	on_drop=_drop_image_row,
+)
+
+# Content-hash LRU of recent /predict results so repeated uploads skip classification
+_PREDICT_CACHE_LOCK = threading.Lock()
+_PREDICT_CACHE: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_PREDICT_CACHE_SIZE = int(os.getenv("PREDICT_CACHE_SIZE", "1024"))
+
+# Semantic cache of /task outputs keyed by prompt embeddings (active only when RAG embeddings load)
+_TASK_CACHE = SemanticCache(threshold=float(os.getenv("TASK_CACHE_THRESHOLD", "0.95")))
 
 # --- Simple background job registry for SDLC builds ---
-_BUILD_JOBS_LOCK = threading.Lock()
-_BUILD_JOBS: Dict[str, Dict[str, Any]] = {}
+# Builds run in a bounded process pool (spawned, so workers don't inherit the API's threads/connections)
+_BUILD_POOL = ProcessPoolExecutor(max_workers=int(os.getenv("SDLC_WORKERS", "4")), mp_context=multiprocessing.get_context("spawn"))
+_BUILD_MAX_PENDING = int(os.getenv("SDLC_MAX_PENDING", "16"))
+# Jobs are sharded by job_id so status polls only contend with updates to the same shard
+_JOB_SHARDS = 16
+_JOB_LOCKS = [threading.Lock() for _ in range(_JOB_SHARDS)]
+_JOB_TABLES: List[Dict[str, Dict[str, Any]]] = [{} for _ in range(_JOB_SHARDS)]
+# Submission order (for "latest") and counters live behind their own small lock
+_RECENT_LOCK = threading.Lock()
+_RECENT_JOBS: "deque[str]" = deque(maxlen=256)
+_JOB_COUNTS = {"total": 0, "running": 0}
+# Job ids: pid + wall-clock ns + process-local counter (unique without reading /dev/urandom)
+_PID = os.getpid()
+_JOB_COUNTER = itertools.count()
+
+
+def _job_shard(job_id: str) -> Tuple[threading.Lock, Dict[str, Dict[str, Any]]]:
+    i = hash(job_id) % _JOB_SHARDS
+    return _JOB_LOCKS[i], _JOB_TABLES[i]
+
+
+def _job_get(job_id: str) -> Optional[Dict[str, Any]]:
+    """Return a snapshot of the job record, or None."""
+    lock, table = _job_shard(job_id)
+    with lock:
+        job = table.get(job_id)
+        return dict(job) if job else None
+
+
+def _job_finish(job_id: str, **fields: Any) -> None:
+    lock, table = _job_shard(job_id)
+    with lock:
+        job = table.get(job_id)
+        if job is None or job.get("status") != "running":
+            return
+        job.update(fields)
+    with _RECENT_LOCK:
+        _JOB_COUNTS["running"] -= 1
 
 
 @app.get("/health")
@@ -98,22 +184,35 @@ def health() -> Dict[str, str]:
 
 @app.get("/logs")
 def list_logs(limit: int = 50) -> Dict[str, Any]:
-	from .services.security import scrub_secrets_in_text
 	items = db.list_logs(limit)
-	for it in items:
-		if isinstance(it.get("message"), str):
-			it["message"] = scrub_secrets_in_text(it["message"]) 
-		if isinstance(it.get("metadata"), dict):
-			# Shallow redact values
-			it["metadata"] = {k: (scrub_secrets_in_text(v) if isinstance(v, str) else v) for k, v in it["metadata"].items()}
+	msg_items = [it for it in items if isinstance(it.get("message"), str)]
+	meta_items = [it for it in items if isinstance(it.get("metadata"), dict)]
+	# Metadata is scrubbed deep as serialized JSON: the secret patterns cannot match quotes or
+	# escapes, so redaction keeps the document valid and one scan covers every nested value
+	values = [it["message"] for it in msg_items] + [orjson.dumps(it["metadata"]).decode("utf-8") for it in meta_items]
+	# Join/split overhead only pays off for larger pages
+	cleaned = scrub_secrets_in_texts(values) if len(items) >= 8 else [scrub_secrets_in_text(v) for v in values]
+	for it, v in zip(msg_items, cleaned):
+		it["message"] = v
+	for it, v in zip(meta_items, cleaned[len(msg_items):]):
+		it["metadata"] = orjson.loads(v)
 	return {"items": items}
 
 
-@app.get("/providers")
-def providers() -> Dict[str, Any]:
-	"""Return detected provider availability and relevant environment hints (redacted)."""
+_PREFERENCE: Tuple[str, ...] = ("mistral", "groq", "hf", "ollama", "openai", "gemini", "perplexity")
+_PROVIDERS_TTL = int(os.getenv("PROVIDERS_TTL", "30"))
+
+
+@lru_cache(maxsize=1)
+def _providers_snapshot(bucket: int) -> Dict[str, Any]:
+	"""Provider/env snapshot for one TTL bucket; `router.refresh()` only runs on a miss."""
 	router.refresh()
-	info = {
+	return _snapshot_dict()
+
+
+def _snapshot_dict() -> Dict[str, Any]:
+	"""Current provider availability and env hints, without refreshing the router."""
+	return {
 		"providers": router.providers,
 		"env": {
 			"OPENAI_API_KEY": bool(os.getenv("OPENAI_API_KEY")),
@@ -126,34 +225,108 @@ def providers() -> Dict[str, Any]:
 			"OLLAMA_BASE_URL": bool(os.getenv("OLLAMA_BASE_URL")),
 		},
 	}
-	return info
+
+
+@app.get("/providers")
+def providers() -> Dict[str, Any]:
+	"""Return detected provider availability and relevant environment hints (redacted)."""
+	return _providers_snapshot(int(time.time()) // max(1, _PROVIDERS_TTL))
+
+
+@app.post("/providers/refresh")
+def providers_refresh() -> Dict[str, Any]:
+	"""Drop the cached provider snapshot and re-probe immediately."""
+	router.refresh(reprobe=True)
+	_providers_snapshot.cache_clear()
+	return _snapshot_dict()
+
+
+def _read_upload(fp: BinaryIO) -> bytes:
+	fp.seek(0)
+	return fp.read()
+
+
+def _queue_image_and_save_prediction(image_bytes: bytes, filename: str, label: str, confidence: float):
+	"""Reserve an image id, persist the prediction and hand the BLOB to the write-behind queue.
+
+	The prediction is committed first so a BLOB write that ultimately fails can remove it.
+	"""
+	image_id = db.reserve_image_id()
+	pred_id = db.save_prediction(image_id=image_id, label=label, confidence=confidence)
+	if not _IMAGE_WRITER.offer((image_id, image_bytes, filename)):
+		db.delete_predictions_for_image(image_id)
+		raise HTTPException(status_code=503, detail={"error": "image_write_queue_full"})
+	return image_id, pred_id
+
+
+def _hash_upload(fp: BinaryIO) -> str:
+	fp.seek(0)
+	h = hashlib.blake2b(digest_size=16)
+	for chunk in iter(lambda: fp.read(1 << 16), b""):
+		h.update(chunk)
+	return h.hexdigest()
+
+
+def _predict_cache_get(key: str) -> Optional[Dict[str, Any]]:
+	with _PREDICT_CACHE_LOCK:
+		hit = _PREDICT_CACHE.get(key)
+		if hit is not None:
+			_PREDICT_CACHE.move_to_end(key)
+		return hit
+
+
+def _predict_cache_put(key: str, value: Dict[str, Any]) -> None:
+	with _PREDICT_CACHE_LOCK:
+		_PREDICT_CACHE[key] = value
+		_PREDICT_CACHE.move_to_end(key)
+		while len(_PREDICT_CACHE) > _PREDICT_CACHE_SIZE:
+			_PREDICT_CACHE.popitem(last=False)
 
 
 @app.post("/predict", response_model=PredictResponse)
-async def predict(file: UploadFile = File(...), notes: Optional[str] = Form(None), request: Request = None):
+async def predict(response: Response, file: UploadFile = File(...), notes: Optional[str] = Form(None), request: Request = None):
 	logger.info("/predict called: filename=%s, client=%s", file.filename, getattr(getattr(request, 'client', None), 'host', None))
-	image_bytes = await file.read()
-	image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-
-	# Route to provider
-	result = router.classify_image(image)
-	logger.info("classification result: provider=%s model=%s label=%s conf=%.3f", result.get("provider"), result.get("model"), result.get("label"), result.get("confidence", 0.0))
-
-	# Persist image and prediction
-	image_id = db.save_image(image_bytes, file.filename)
-	pred_id = db.save_prediction(image_id=image_id, label=result["label"], confidence=result["confidence"]) 
-	logger.info("saved image_id=%s prediction_id=%s", image_id, pred_id)
-
-	# Log operation + RAG index
-	log_id = db.save_log(
-		stage="predict",
-		provider=result.get("provider"),
-		model=result.get("model"),
-		success=True,
-		message="prediction completed",
-		metadata=result,
-	)
-	rag.index_text(f"Prediction: {result['label']} conf={result['confidence']}")
+	key = await asyncio.to_thread(_hash_upload, file.file)
+	cached = _predict_cache_get(key)
+	if cached is not None:
+		# Identical image seen before: skip classification, persistence and RAG indexing
+		response.headers["X-Predict-Cache"] = "hit"
+		result, image_id = cached["result"], cached["image_id"]
+		log_id = await asyncio.to_thread(
+			db.save_log,
+			stage="predict",
+			provider=result.get("provider"),
+			model=result.get("model"),
+			success=True,
+			message="prediction served from cache",
+			metadata={**result, "cached": True, "image_id": image_id},
+		)
+		logger.info("predict cache hit: image_id=%s label=%s", image_id, result.get("label"))
+	else:
+		response.headers["X-Predict-Cache"] = "miss"
+		# Read the spooled upload once; the router only decodes pixels if it falls back to the local baseline
+		image_bytes = await asyncio.to_thread(_read_upload, file.file)
+
+		# Route to provider
+		result = await _PREDICT_BATCHER.submit((image_bytes, file.content_type))
+		logger.info("classification result: provider=%s model=%s label=%s conf=%.3f", result.get("provider"), result.get("model"), result.get("label"), result.get("confidence", 0.0))
+
+		# Persist image + prediction, log operation and RAG index concurrently
+		(image_id, pred_id), log_id, _ = await asyncio.gather(
+			asyncio.to_thread(_queue_image_and_save_prediction, image_bytes, file.filename, result["label"], result["confidence"]),
+			asyncio.to_thread(
+				db.save_log,
+				stage="predict",
+				provider=result.get("provider"),
+				model=result.get("model"),
+				success=True,
+				message="prediction completed",
+				metadata=result,
+			),
+			asyncio.to_thread(rag.index_text, f"Prediction: {result['label']} conf={result['confidence']}"),
+		)
+		logger.info("saved image_id=%s prediction_id=%s", image_id, pred_id)
+		_predict_cache_put(key, {"result": result, "image_id": image_id})
 
 	run_report = {
 		"summary": "Image classified",
@@ -170,7 +343,7 @@ async def predict(file: UploadFile = File(...), notes: Optional[str] = Form(None
 		"commands": {"setup": [], "run": [], "test": [], "deploy": []},
 		"logs": [
 			{
-				"timestamp": datetime.utcnow().isoformat(),
+				"timestamp": utc_iso(),
 				"stage": "predict",
 				"success": True,
 				"message": "classification done",
@@ -190,20 +363,39 @@ async def predict(file: UploadFile = File(...), notes: Optional[str] = Form(None
 
 
 @app.post("/task")
-def run_text_task(req: TextTask, request: Request = None) -> Dict[str, Any]:
+async def run_text_task(req: TextTask, request: Request = None) -> Dict[str, Any]:
 	logger.info("/task called: client=%s", getattr(getattr(request, 'client', None), 'host', None))
+	vec = await asyncio.to_thread(rag.embed, req.prompt)
+	hit = _TASK_CACHE.get(vec) if vec is not None else None
+	if hit is not None:
+		log_id = await asyncio.to_thread(
+			db.save_log,
+			stage="task",
+			provider=hit.get("provider"),
+			model=hit.get("model"),
+			success=True,
+			message="text task served from semantic cache",
+			metadata={**hit, "cached": True},
+		)
+		logger.info("text task: semantic cache hit log_id=%s", log_id)
+		return {"output": hit.get("output"), "log_id": log_id}
 	# Prefer non-OpenAI providers first to utilize all configured keys
-	preference = ["mistral", "groq", "hf", "ollama", "openai", "gemini", "perplexity"]
-	response = router.generate_text(req.prompt, preference=preference)
-	log_id = db.save_log(
-		stage="task",
-		provider=response.get("provider"),
-		model=response.get("model"),
-		success=True,
-		message="text task completed",
-		metadata=response,
+	response = await router.agenerate_text(req.prompt, preference=_PREFERENCE)
+	log_id, _ = await asyncio.gather(
+		asyncio.to_thread(
+			db.save_log,
+			stage="task",
+			provider=response.get("provider"),
+			model=response.get("model"),
+			success=True,
+			message="text task completed",
+			metadata=response,
+		),
+		asyncio.to_thread(rag.index_text, f"Task: {req.prompt}\nOutput: {response.get('output','')}"),
 	)
-	rag.index_text(f"Task: {req.prompt}\nOutput: {response.get('output','')}")
+	# Baseline output echoes the prompt, so only real provider answers are reusable
+	if vec is not None and not response.get("fallback"):
+		_TASK_CACHE.put(vec, response)
 	logger.info("text task: provider=%s model=%s log_id=%s", response.get("provider"), response.get("model"), log_id)
 	return {
 		"output": response.get("output"),
@@ -211,6 +403,56 @@ def run_text_task(req: TextTask, request: Request = None) -> Dict[str, Any]:
 	}
 
 
+@app.post("/task/stream")
+def run_text_task_stream(req: TextTask) -> StreamingResponse:
+	"""Stream generated text as plain-text chunks; the log and RAG entry are written once it completes."""
+	def body():
+		parts: List[str] = []
+		served: Dict[str, Any] = {}
+		for chunk in router.generate_text_stream(req.prompt, preference=_PREFERENCE, served=served):
+			parts.append(chunk)
+			yield chunk
+		output = "".join(parts)
+		db.save_log(
+			stage="task",
+			provider=served.get("provider"),
+			model=served.get("model"),
+			success=True,
+			message="text task streamed",
+			metadata={**served, "chars": len(output)},
+		)
+		rag.index_text(f"Task: {req.prompt}\nOutput: {output}")
+
+	return StreamingResponse(body(), media_type="text/plain; charset=utf-8")
+
+
+def _warm_task_cache(limit: int = 200) -> None:
+	"""Seed the /task semantic cache from recently indexed task outputs, embedding them in one batch."""
+	entries: List[Tuple[str, str]] = []
+	for text in rag.recent(limit):
+		if not text.startswith("Task: "):
+			continue
+		prompt, sep, output = text[len("Task: "):].partition("\nOutput: ")
+		if not sep or not output or output.startswith("[baseline]"):
+			continue
+		entries.append((prompt, output))
+	if not entries:
+		return
+	vecs = rag.embed_batch([prompt for prompt, _ in entries])
+	if vecs is None:
+		return
+	for vec, (_, output) in zip(vecs, entries):
+		if _TASK_CACHE.get(vec) is None:
+			_TASK_CACHE.put(vec, {"output": output, "provider": "cache", "model": None})
+
+
+def _warm_task_cache_in_background() -> None:
+	try:
+		_warm_task_cache()
+	except Exception as e:
+		logger.warning("task cache warm-up failed: %s", e)
+
+
 class BuildRequest(BaseModel):
 	prompt: str
 
@@ -227,15 +469,56 @@ class SDLCBuildRequest(BaseModel):
     prompt: str
 
 
+def _mark_build_failed(job_id: str, error: str) -> None:
+    _job_finish(job_id, status="failed", finished_at=utc_iso(), error=error)
+
+
+def _finalize_build(job_id: str, started_at: str, fut: "Future[Dict[str, Any]]") -> None:
+    """Done-callback for pooled builds: persist status.json and update the job registry."""
+    try:
+        result = fut.result()
+    except Exception as e:
+        logger.error("[job %s] build failed: %s", job_id, e, exc_info=e)
+        _mark_build_failed(job_id, str(e))
+        return
+    run_dir = result.get("run_dir")
+    # Persist status to run directory
+    try:
+        if run_dir:
+            status_path = pathlib.Path(run_dir) / "status.json"
+            status_obj = {
+                "job_id": job_id,
+                "status": "completed",
+                "started_at": started_at,
+                "finished_at": utc_iso(),
+                "run_dir": run_dir,
+                "summary": result.get("summary"),
+            }
+            write_file(str(status_path), orjson.dumps(status_obj, option=orjson.OPT_INDENT_2))
+    except Exception as e:
+        logger.warning("[job %s] failed to write status.json: %s", job_id, e)
+    finally:
+        _job_finish(job_id, status="completed", finished_at=utc_iso(), run_dir=run_dir)
+    logger.info("/sdlc/build completed: dir=%s job_id=%s", run_dir, job_id)
+
+
 @app.post("/sdlc/build")
 def sdlc_build(req: SDLCBuildRequest, request: Request = None) -> Dict[str, Any]:
     logger.info("/sdlc/build called: client=%s prompt_len=%s", getattr(getattr(request, 'client', None), 'host', None), len(req.prompt or ""))
 
-    job_id = uuid.uuid4().hex
-    started_at = datetime.utcnow().isoformat()
-
-    with _BUILD_JOBS_LOCK:
-        _BUILD_JOBS[job_id] = {
+    job_id = f"{_PID:x}{time.time_ns():x}{next(_JOB_COUNTER):x}"
+    started_at = utc_iso()
+
+    with _RECENT_LOCK:
+        running = _JOB_COUNTS["running"]
+        if running >= _BUILD_MAX_PENDING:
+            raise HTTPException(status_code=429, detail={"error": "too_many_builds", "running": running})
+        _JOB_COUNTS["running"] += 1
+        _JOB_COUNTS["total"] += 1
+        _RECENT_JOBS.append(job_id)
+    lock, table = _job_shard(job_id)
+    with lock:
+        table[job_id] = {
             "job_id": job_id,
             "status": "running",
             "prompt_len": len(req.prompt or ""),
@@ -245,82 +528,66 @@ def sdlc_build(req: SDLCBuildRequest, request: Request = None) -> Dict[str, Any]
             "error": None,
         }
 
-    def _run_build(job_id: str, prompt: str) -> None:
-        try:
-            logger.info("[job %s] build started", job_id)
-            result = builder.build(prompt)
-            run_dir = result.get("run_dir")
-            # Persist status to run directory
-            try:
-                if run_dir:
-                    status_path = pathlib.Path(run_dir) / "status.json"
-                    status_obj = {
-                        "job_id": job_id,
-                        "status": "completed",
-                        "started_at": started_at,
-                        "finished_at": datetime.utcnow().isoformat(),
-                        "run_dir": run_dir,
-                        "summary": result.get("summary"),
-                    }
-                    status_path.write_text(json.dumps(status_obj, indent=2), encoding="utf-8")
-            except Exception as e:
-                logger.warning("[job %s] failed to write status.json: %s", job_id, e)
-            finally:
-                with _BUILD_JOBS_LOCK:
-                    if job_id in _BUILD_JOBS:
-                        _BUILD_JOBS[job_id]["status"] = "completed"
-                        _BUILD_JOBS[job_id]["finished_at"] = datetime.utcnow().isoformat()
-                        _BUILD_JOBS[job_id]["run_dir"] = run_dir
-            logger.info("/sdlc/build completed: dir=%s job_id=%s", run_dir, job_id)
-        except Exception as e:
-            logger.exception("[job %s] build failed: %s", job_id, e)
-            with _BUILD_JOBS_LOCK:
-                if job_id in _BUILD_JOBS:
-                    _BUILD_JOBS[job_id]["status"] = "failed"
-                    _BUILD_JOBS[job_id]["finished_at"] = datetime.utcnow().isoformat()
-                    _BUILD_JOBS[job_id]["error"] = str(e)
-
-    t = threading.Thread(target=_run_build, args=(job_id, req.prompt), daemon=True)
-    t.start()
+    logger.info("[job %s] build submitted", job_id)
+    try:
+        fut = _BUILD_POOL.submit(run_build, req.prompt, _SDLC_FAST_MODE)
+    except Exception as e:
+        logger.exception("[job %s] build submit failed: %s", job_id, e)
+        _mark_build_failed(job_id, str(e))
+        return {"status": "build_failed", "job_id": job_id, "error": str(e)}
+    fut.add_done_callback(lambda f: _finalize_build(job_id, started_at, f))
 
     return {"status": "build_started", "job_id": job_id}
 
 
 @app.get("/sdlc/status")
 def sdlc_status(job_id: Optional[str] = None) -> Dict[str, Any]:
-    with _BUILD_JOBS_LOCK:
-        if job_id:
-            job = _BUILD_JOBS.get(job_id)
-            return job or {"error": "job_not_found", "job_id": job_id}
-        # Return latest job by started_at
-        if not _BUILD_JOBS:
-            return {"jobs": []}
-        latest = max(_BUILD_JOBS.values(), key=lambda j: j.get("started_at") or "")
-        return {"latest": latest, "jobs_count": len(_BUILD_JOBS)}
+    if job_id:
+        job = _job_get(job_id)
+        return job or {"error": "job_not_found", "job_id": job_id}
+    # Return latest job by submission order
+    with _RECENT_LOCK:
+        latest_id = _RECENT_JOBS[-1] if _RECENT_JOBS else None
+        jobs_count = _JOB_COUNTS["total"]
+    if latest_id is None:
+        return {"jobs": []}
+    return {"latest": _job_get(latest_id), "jobs_count": jobs_count}
+
+
+def _read_report(report_path: pathlib.Path) -> Dict[str, Any]:
+    """Load run_report.json, inlining the stage records streamed to its logs.jsonl."""
+    data = orjson.loads(report_path.read_bytes())
+    logs_path = data.get("logs_path")
+    if "logs" not in data and isinstance(logs_path, str):
+        try:
+            with open(report_path.parent / logs_path, "rb") as f:
+                data["logs"] = [orjson.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            data["logs"] = []
+    return data
 
 
 @app.get("/sdlc/report")
-def sdlc_report(job_id: Optional[str] = None, run_dir: Optional[str] = None) -> Dict[str, Any]:
+async def sdlc_report(job_id: Optional[str] = None, run_dir: Optional[str] = None) -> Dict[str, Any]:
     """Return the run_report.json for a completed build.
 
     One of job_id or run_dir must be provided.
     """
     target_dir: Optional[str] = None
     if job_id:
-        with _BUILD_JOBS_LOCK:
-            job = _BUILD_JOBS.get(job_id)
-            if job and isinstance(job.get("run_dir"), str):
-                target_dir = job.get("run_dir")
+        job = _job_get(job_id)
+        if job and isinstance(job.get("run_dir"), str):
+            target_dir = job.get("run_dir")
     if not target_dir and run_dir:
         target_dir = run_dir
     if not target_dir:
         return {"error": "missing_job_id_or_run_dir"}
     report_path = pathlib.Path(str(target_dir)) / "run_report.json"
-    if not report_path.exists():
-        return {"error": "report_not_found", "run_dir": str(target_dir)}
     try:
-        data = json.loads(report_path.read_text(encoding="utf-8"))
-        return data
+        # Disk reads happen off the event loop; a missing file is detected by the read itself
+        return await asyncio.to_thread(_read_report, report_path)
+    except FileNotFoundError:
+        return {"error": "report_not_found", "run_dir": str(target_dir)}
     except Exception as e:
         return {"error": "report_read_error", "message": str(e)}
 
@@ -351,25 +618,24 @@ class MaterializeRequest(BaseModel):
 	free_only: bool = True
 
 
+def _write_preview(outdir: pathlib.Path, files: Dict[str, str], kind: str, tool: str) -> None:
+	write_files(str(outdir), scrub_files(files))
+	append_audit("materialize", {"dir": str(outdir), "kind": kind, "tool": tool})
+
+
 @app.post("/materialize")
-def materialize(req: MaterializeRequest) -> Dict[str, Any]:
+async def materialize(req: MaterializeRequest) -> Dict[str, Any]:
 	kind = classify_prompt(req.prompt)
 	tool = pick_tool(kind, req.free_only)
-	result = router.run_tool(tool, req.prompt)
+	result = await asyncio.to_thread(router.run_tool, tool, req.prompt)
 	files = result.get("files") if isinstance(result, dict) else None
 	if not files:
 		return {"error": "No files returned by tool", "kind": kind, "tool": tool}
-	files = scrub_files(files)
-	# write to runs/
+	# write to runs/ (scrub + disk IO off the event loop)
 	root = pathlib.Path("runs")
-	root.mkdir(parents=True, exist_ok=True)
 	dirname = datetime.utcnow().strftime("preview-%Y%m%d-%H%M%S")
 	outdir = root / dirname
-	for path, content in files.items():
-		p = outdir / path
-		p.parent.mkdir(parents=True, exist_ok=True)
-		p.write_text(content, encoding="utf-8")
-	append_audit("materialize", {"dir": str(outdir), "kind": kind, "tool": tool})
+	await asyncio.to_thread(_write_preview, outdir, files, kind, tool)
 	commands = [
 		"cd " + str(outdir).replace("\\", "/"),
 		"npm install (if package.json exists)",
@@ -379,36 +645,42 @@ def materialize(req: MaterializeRequest) -> Dict[str, Any]:
 
 
 @app.post("/diagnostics")
-def diagnostics() -> Dict[str, Any]:
-	"""Run pytest (with JSON report) and flake8, returning summarized results.
+async def diagnostics() -> Dict[str, Any]:
+	"""Run pytest (with JSON report) and flake8 concurrently, returning summarized results.
 	Note: For full isolation, run in Docker as per compose. This runs locally with timeouts.
 	"""
 	logs_dir = pathlib.Path("logs")
 	logs_dir.mkdir(parents=True, exist_ok=True)
 	pytest_json = logs_dir / "pytest-report.json"
 
-	def run_cmd(cmd: str, timeout: int = 120) -> Dict[str, Any]:
+	async def run_cmd(cmd: str, timeout: int = 120) -> Dict[str, Any]:
+		proc = await asyncio.create_subprocess_exec(*shlex.split(cmd), stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
 		try:
-			proc = subprocess.run(shlex.split(cmd), stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout, check=False, text=True)
-			return {"code": proc.returncode, "stdout": proc.stdout[-4000:], "stderr": proc.stderr[-4000:]}
-		except subprocess.TimeoutExpired:
+			stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+		except asyncio.TimeoutError:
+			proc.kill()
+			await proc.wait()
 			return {"code": -1, "stdout": "", "stderr": "timeout"}
+		return {
+			"code": proc.returncode,
+			"stdout": stdout[-4000:].decode("utf-8", errors="replace"),
+			"stderr": stderr[-4000:].decode("utf-8", errors="replace"),
+		}
 
 	pytest_cmd = f"pytest -q --maxfail=1 --disable-warnings --json-report --json-report-file={pytest_json.as_posix()}"
 	flake8_cmd = "flake8"
-	pytest_res = run_cmd(pytest_cmd, timeout=180)
-	flake8_res = run_cmd(flake8_cmd, timeout=120)
+	pytest_res, flake8_res = await asyncio.gather(run_cmd(pytest_cmd, timeout=180), run_cmd(flake8_cmd, timeout=120))
 
 	pytest_report: Dict[str, Any] = {}
 	if pytest_json.exists():
 		try:
-			pytest_report = json.loads(pytest_json.read_text(encoding="utf-8"))
+			pytest_report = orjson.loads(pytest_json.read_bytes())
 		except Exception:
 			pytest_report = {}
 
 	return {
 		"run_id": datetime.utcnow().strftime("diag-%Y%m%d-%H%M%S"),
-		"timestamp": datetime.utcnow().isoformat(),
+		"timestamp": utc_iso(),
 		"checks": {
 			"pytest": {"exit_code": pytest_res["code"], "summary": pytest_report.get("summary", {}), "paths": {"json": pytest_json.as_posix()}},
 			"flake8": {"exit_code": flake8_res["code"], "stderr": flake8_res.get("stderr", "")[:1000]},
@@ -424,17 +696,38 @@ class SaveSpecRequest(BaseModel):
 	filename: str | None = None
 
 
+def _write_spec(path: pathlib.Path, content: str) -> None:
+	path.parent.mkdir(parents=True, exist_ok=True)
+	write_file(str(path), content)
+	append_audit("save_spec", {"path": str(path)})
+
+
 @app.post("/save_spec")
-def save_spec(req: SaveSpecRequest) -> Dict[str, Any]:
-	root = pathlib.Path("runs")
-	root.mkdir(parents=True, exist_ok=True)
+async def save_spec(req: SaveSpecRequest) -> Dict[str, Any]:
 	name = req.filename or ("requirements-" + datetime.utcnow().strftime("%Y%m%d-%H%M%S") + ".md")
-	path = root / name
-	path.write_text(req.content or "", encoding="utf-8")
-	append_audit("save_spec", {"path": str(path)})
+	path = pathlib.Path("runs") / name
+	await asyncio.to_thread(_write_spec, path, req.content or "")
 	return {"path": str(path)}
 
 
+@app.on_event("startup")
+async def _bind_executor() -> None:
+	asyncio.get_running_loop().set_default_executor(_EXECUTOR)
+	_PREDICT_BATCHER.start()
+	_IMAGE_WRITER.start()
+
+
+@app.on_event("shutdown")
+async def _on_shutdown() -> None:
+	await _PREDICT_BATCHER.stop()
+	await asyncio.to_thread(_IMAGE_WRITER.stop)
+	_EXECUTOR.shutdown(wait=False)
+	_BUILD_POOL.shutdown(wait=False, cancel_futures=True)
+	router.close()
+	agent.close()
+	await asyncio.to_thread(rag.save)
+
+
 @app.on_event("startup")
 def _on_startup() -> None:
 	load_dotenv()
@@ -442,6 +735,8 @@ def _on_startup() -> None:
 	logger.info("API startup: DB=%s, RAG optional=%s", os.getenv("PRIMARY_DB_URL", "sqlite:///app.db"), "enabled")
 	router.refresh()
 	agent.router.refresh()
+	# Loading the embedding model and encoding past prompts must not hold up serving
+	threading.Thread(target=_warm_task_cache_in_background, name="task-cache-warmup", daemon=True).start()
 
 
 # --- CRUD: Students ---
@@ -554,6 +849,10 @@ def delete_requirement(req_id: int) -> Dict[str, Any]:
 	success = db.delete_requirement(req_id)
 	return {"success": bool(success)}
 
+# Resolve any deferred schemas now so no validator/serializer is built lazily on a first request
+for _model in (PredictResponse, TextTask, BuildRequest, SDLCBuildRequest, DispatchRequest, MaterializeRequest, SaveSpecRequest, StudentIn, EventIn, RequirementIn):
+	_model.model_rebuild()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("backend.main:app", host="127.0.0.1", port=8000, reload=True)
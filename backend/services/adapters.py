@@ -1,48 +1,362 @@
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from collections import deque
+from functools import lru_cache
 from PIL import Image
 import io
 import os
+import asyncio
 import base64
+import logging
+import threading
+import time
+import weakref
+import orjson
 import requests
-from tenacity import retry, wait_exponential, stop_after_attempt
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+try:  # numpy ships with the embeddings stack; the baseline only uses it for a vectorized mean
+	import numpy as np  # type: ignore
+except Exception:
+	np = None
+
+from .imaging import decode_image
+from .llm_cache import CacheMiss, LLMCache
+
+
+# Model served per text provider; part of the response cache key
+_TEXT_MODELS: Dict[str, str] = {
+	"gemini": "gemini-1.5-flash",
+	"perplexity": "sonar-small-chat",
+	"hf": "Qwen2.5-7B-Instruct (inference)",
+	"mistral": "mistral-small-latest",
+	"groq": "llama-3.1-8b-instant",
+	"openai": "gpt-4o-mini",
+	"ollama": "codellama",
+}
+# Sampling temperature for chat providers; low enough that cached responses are safe to replay
+_TEMPERATURE = 0.2
+_VISION_MODEL = "vit-base-patch16-224"
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# OpenAI-compatible chat endpoints that support SSE streaming: provider -> (url, api key env var)
+_SSE_ENDPOINTS: Dict[str, Tuple[str, str]] = {
+	"openai": ("https://api.openai.com/v1/chat/completions", "OPENAI_API_KEY"),
+	"mistral": ("https://api.mistral.ai/v1/chat/completions", "MISTRAL_API_KEY"),
+	"groq": ("https://api.groq.com/openai/v1/chat/completions", "GROQ_API_KEY"),
+	"perplexity": ("https://api.perplexity.ai/chat/completions", "PERPLEXITY_API_KEY"),
+}
+
+# Default provider priorities; filtered against availability once per provider refresh
+_TEXT_ORDER = ("gemini", "perplexity", "hf", "mistral", "groq", "openai", "ollama")
+_VISION_ORDER = ("openai", "gemini", "groq", "hf", "ollama")
+_CODEGEN_ORDER = ("openai", "mistral", "groq", "hf", "ollama")
+
+
+# Provider retry policy, applied at the connection layer on the pooled session: connection errors
+# and these statuses are retried with 0.5s, 1s, 2s backoff (or the server's Retry-After). Read
+# timeouts are not retried, so a hung provider costs one timeout before the fallback moves on.
+_RETRY_TOTAL = 3
+_RETRY_BACKOFF = 0.5
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def _retry_policy() -> Retry:
+	# raise_on_status=False hands back the last response, so callers see the real HTTP error
+	return Retry(
+		total=_RETRY_TOTAL,
+		read=False,
+		backoff_factor=_RETRY_BACKOFF,
+		status_forcelist=_RETRY_STATUSES,
+		allowed_methods=frozenset({"GET", "POST"}),
+		respect_retry_after_header=True,
+		raise_on_status=False,
+	)
+
+
+def _retry_after(resp: Any, attempt: int) -> float:
+	try:
+		return min(float(resp.headers.get("Retry-After", "")), 30.0)
+	except ValueError:
+		return _RETRY_BACKOFF * (2 ** attempt)
+
+
+class _Http2Response:
+	"""The slice of requests.Response the adapters use, over an httpx response."""
+
+	def __init__(self, resp: Any) -> None:
+		self._resp = resp
+
+	@property
+	def ok(self) -> bool:
+		return self._resp.is_success
+
+	@property
+	def content(self) -> bytes:
+		return self._resp.read()
+
+	def raise_for_status(self) -> None:
+		self._resp.raise_for_status()
+
+	def iter_lines(self) -> Iterator[bytes]:
+		for line in self._resp.iter_lines():
+			yield line.encode("utf-8")
+
+	def __enter__(self) -> "_Http2Response":
+		return self
+
+	def __exit__(self, *exc: Any) -> None:
+		self._resp.close()
+
+
+class _Http2Session:
+	"""requests.Session-compatible facade over httpx.Client(http2=True), multiplexing calls per host."""
+
+	def __init__(self) -> None:
+		import httpx  # type: ignore
+		self._client = httpx.Client(http2=True, limits=httpx.Limits(max_connections=64, max_keepalive_connections=32))
+
+	def get(self, url: str, timeout: Optional[float] = None) -> _Http2Response:
+		# Only used for reachability probes, which must fail fast: no retries
+		return _Http2Response(self._send(self._client.build_request("GET", url, timeout=timeout), False, 0))
+
+	def post(self, url: str, headers: Optional[Dict[str, str]] = None, data: Optional[bytes] = None, timeout: Optional[float] = None, stream: bool = False) -> _Http2Response:
+		request = self._client.build_request("POST", url, headers=headers, content=data, timeout=timeout)
+		return _Http2Response(self._send(request, stream, _RETRY_TOTAL))
+
+	def _send(self, request: Any, stream: bool, retries: int) -> Any:
+		"""Send with the same retry policy as the requests adapter, raising requests' exception types."""
+		import httpx  # type: ignore
+		for attempt in range(retries + 1):
+			try:
+				resp = self._client.send(request, stream=stream)
+			except httpx.TransportError as e:
+				# Only failures to connect are retried; the request may already be in flight otherwise
+				if attempt < retries and isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout)):
+					time.sleep(_RETRY_BACKOFF * (2 ** attempt))
+					continue
+				exc = requests.Timeout if isinstance(e, httpx.TimeoutException) else requests.ConnectionError
+				raise exc(str(e)) from e
+			if resp.status_code not in _RETRY_STATUSES or attempt == retries:
+				return resp
+			resp.close()
+			time.sleep(_retry_after(resp, attempt))
+		raise AssertionError("unreachable")
+
+	def close(self) -> None:
+		self._client.close()
+
+
+def _http2_available() -> bool:
+	try:
+		import httpx  # type: ignore  # noqa: F401
+		import h2  # type: ignore  # noqa: F401
+		return True
+	except Exception:
+		return False
+
+
+def _build_session() -> Any:
+	"""Keep-alive session sized for concurrent executor threads, retrying at the connection layer.
+
+	PROVIDER_HTTP2=auto (default) uses HTTP/2 via httpx when httpx and h2 are installed;
+	1 requires it, 0 always uses requests over HTTP/1.1.
+	"""
+	mode = os.getenv("PROVIDER_HTTP2", "auto").strip().lower()
+	if mode in ("1", "true") or (mode == "auto" and _http2_available()):
+		return _Http2Session()
+	session = requests.Session()
+	# pool_maxsize covers every provider bulkhead sharing one host (e.g. HF text + vision) at full load
+	adapter = HTTPAdapter(pool_connections=16, pool_maxsize=64, max_retries=_retry_policy())
+	session.mount("https://", adapter)
+	session.mount("http://", adapter)
+	# The localhost Ollama probe must fail fast when nothing is listening
+	session.mount("http://localhost:11434", HTTPAdapter(max_retries=Retry(total=0)))
+	return session
+
+
+logger = logging.getLogger(__name__)
+
+# Circuit breaker: open after this many consecutive failures; cooldown grows 1s, 4s, 16s... up to the cap
+_BREAKER_THRESHOLD = 3
+_BREAKER_MAX_COOLDOWN = 300.0
+
+# Adaptive timeouts: 1.3x rolling p95 once enough samples exist, floored at 2s and capped at the default
+_DEFAULT_TIMEOUT = 60.0
+_TIMEOUT_MIN_SAMPLES = 10
+# Hedge delay while a provider has too few latency samples for a p95
+_HEDGE_COLD_DELAY = 10.0
+
+# Environment read by provider detection and request setup; snapshotted once per refresh
+_ENV_KEYS = (
+	"OPENAI_API_KEY", "GEMINI_API_KEY", "MISTRAL_API_KEY", "GROQ_API_KEY", "PERPLEXITY_API_KEY",
+	"HF_API_KEY", "HUGGINGFACE_API_KEY", "V0_API_KEY", "V0_DEV_API_KEY", "V0_API_BASE", "OLLAMA_BASE_URL",
+)
+
+_OLLAMA_PROBE_TTL = int(os.getenv("OLLAMA_PROBE_TTL", "30"))
+_OLLAMA_DOWN_BACKOFF = int(os.getenv("OLLAMA_DOWN_BACKOFF", "900"))
+# base URL -> monotonic deadline before which a refused Ollama server is not probed again
+_ollama_down_until: Dict[str, float] = {}
+
+
+@lru_cache(maxsize=8)
+def _probe_ollama(session: requests.Session, base: str, bucket: int) -> bool:
+	"""Reachability of an Ollama server, memoized per TTL bucket so refreshes don't re-probe."""
+	if time.monotonic() < _ollama_down_until.get(base, 0.0):
+		return False
+	try:
+		return session.get(base.rstrip("/") + "/api/tags", timeout=1.5).ok
+	except requests.ConnectionError:
+		# Nothing listening (Ollama not installed): skip the connect attempt for much longer
+		_ollama_down_until[base] = time.monotonic() + _OLLAMA_DOWN_BACKOFF
+		return False
+	except Exception:
+		return False
+
+
+def _fenced_block(text: str) -> Optional[str]:
+	"""Body of the first ```json (or bare ```) fence, found by linear scans rather than a regex."""
+	start = text.find("```json")
+	if start < 0:
+		start = text.find("```")
+	if start < 0:
+		return None
+	body_start = text.find("\n", start) + 1
+	if body_start == 0:
+		return None
+	body_end = text.find("```", body_start)
+	return text[body_start:body_end] if body_end >= 0 else None
+
+
+@lru_cache(maxsize=32)
+def _parse_files_payload(text: str) -> Dict[str, str]:
+	"""Parse a {path: content} JSON object; memoized because the same output is often re-parsed."""
+	data = orjson.loads(text)
+	if not isinstance(data, dict):
+		raise ValueError("files payload is not a dict")
+	return {str(k): str(v) for k, v in data.items()}
 
 
 class InferenceRouter:
 	"""Unified routing with graceful fallbacks. Uses a simple local baseline when no keys set."""
 
+	# Input size of the local baseline classifier; uploads are decoded straight to this size
+	TARGET_SIZE: Tuple[int, int] = (32, 32)
+
 	def __init__(self) -> None:
-		self.providers = self._detect_providers()
+		# One keep-alive connection pool shared by every provider call (TLS/TCP reused across requests)
+		self._session = _build_session()
+		# Hedged fallback: next provider starts after a failure or `hedge_delay` seconds of silence.
+		# Unset, the delay is the running provider's rolling p95, so only tail latency is hedged
+		fixed_delay = os.getenv("LLM_HEDGE_DELAY", "").strip()
+		self.hedge_delay: Optional[float] = float(fixed_delay) if fixed_delay else None
+		self.hedge_max_inflight = max(1, int(os.getenv("LLM_HEDGE_MAX_INFLIGHT", "2")))
+		# Bulkheads: each provider gets its own bounded pool so a slow backend can't starve the others
+		self.provider_pool_size = max(1, int(os.getenv("PROVIDER_POOL_SIZE", "8")))
+		self._pools: Dict[str, ThreadPoolExecutor] = {}
+		self._inflight: Dict[str, int] = {}
+		self._pools_lock = threading.Lock()
+		# Long-lived workers for generate_text_batch; started on first batch
+		self._batch_pool: Optional[ThreadPoolExecutor] = None
+		self._cache = LLMCache()
+		# id(image) -> (weakref, JPEG bytes) so re-classifying the same PIL image skips the encode
+		self._jpeg_memo: Dict[int, Tuple[Any, bytes]] = {}
+		self._breaker: Dict[str, Dict[str, Any]] = {}
+		self._breaker_lock = threading.Lock()
+		# Rolling call durations per (provider, call kind), used to derive timeouts and hedge delays.
+		# Kinds are kept apart so short text prompts can't shrink the timeout of long code generations
+		self._latency: Dict[Tuple[str, str], "deque[float]"] = {}
+		# Text provider name -> chat method returning (text, tokens)
+		self._dispatch = {
+			"gemini": self._gemini_chat,
+			"perplexity": self._perplexity_chat,
+			"hf": self._hf_generate_text,
+			"mistral": self._mistral_chat,
+			"groq": self._groq_chat,
+			"openai": self._openai_chat,
+			"ollama": self._ollama_chat,
+		}
+		self._set_providers(self._detect_providers())
+
+	def close(self) -> None:
+		"""Release pooled provider connections, hedge threads and the response cache."""
+		with self._pools_lock:
+			pools, self._pools = list(self._pools.values()), {}
+			if self._batch_pool is not None:
+				pools.append(self._batch_pool)
+				self._batch_pool = None
+		for pool in pools:
+			pool.shutdown(wait=False)
+		self._session.close()
+		self._cache.close()
+
+	def refresh(self, reprobe: bool = False) -> None:
+		"""Re-detect providers (e.g., after loading .env); `reprobe` also forgets cached Ollama probes."""
+		if reprobe:
+			_probe_ollama.cache_clear()
+			_ollama_down_until.clear()
+		prev_cfg = self.cfg
+		providers = self._detect_providers()
+		# Same env and probe results: keep the derived orderings and request contexts as they are
+		if reprobe or providers != self.providers or self.cfg != prev_cfg:
+			self._set_providers(providers)
 
-	def refresh(self) -> None:
-		"""Re-detect providers (e.g., after loading .env)."""
-		self.providers = self._detect_providers()
+	def _set_providers(self, providers: Dict[str, bool]) -> None:
+		"""Install a provider snapshot and precompute the orderings derived from it."""
+		self.providers = providers
+		self._available_set = frozenset(n for n, ok in providers.items() if ok)
+		self._text_order: Tuple[str, ...] = tuple(n for n in _TEXT_ORDER if providers.get(n))
+		self._vision_pick = next(((n, "auto") for n in _VISION_ORDER if providers.get(n)), ("local", "baseline"))
+		self._codegen_pick = next(((n, "auto") for n in _CODEGEN_ORDER if providers.get(n)), ("local", "baseline"))
+		self._http_ctx = self._build_http_ctx()
+
+	def _build_http_ctx(self) -> Dict[str, Dict[str, Any]]:
+		"""Resolve endpoint URLs and auth headers once per refresh instead of on every call."""
+		def bearer(key: Optional[str]) -> Dict[str, str]:
+			return {"Authorization": f"Bearer {key}", "Content-Type": "application/json"}
+
+		cfg = self.cfg
+		hf_key = self._get_hf_key()
+		ctx = {name: {"url": url, "headers": bearer(cfg.get(env))} for name, (url, env) in _SSE_ENDPOINTS.items()}
+		ctx["gemini"] = {
+			"url": f"https://generativelanguage.googleapis.com/v1/models/{_TEXT_MODELS['gemini']}:generateContent?key={cfg.get('GEMINI_API_KEY')}",
+			"headers": _JSON_HEADERS,
+		}
+		ctx["hf"] = {"url": "https://api-inference.huggingface.co/models/Qwen/Qwen2.5-7B-Instruct", "headers": bearer(hf_key)}
+		ctx["hf_vision"] = {"url": f"https://api-inference.huggingface.co/models/google/{_VISION_MODEL}", "headers": bearer(hf_key)}
+		ctx["ollama"] = {"url": f"{cfg.get('OLLAMA_BASE_URL') or 'http://localhost:11434'}/api/generate", "headers": _JSON_HEADERS}
+		ctx["v0"] = {
+			"url": f"{cfg.get('V0_API_BASE') or 'https://api.v0.dev'}/generate",
+			"headers": bearer(cfg.get("V0_API_KEY") or cfg.get("V0_DEV_API_KEY")),
+		}
+		# SSE variants ask for an event stream
+		for name in _SSE_ENDPOINTS:
+			ctx[name]["stream_headers"] = {**ctx[name]["headers"], "Accept": "text/event-stream"}
+		return ctx
 
 	def _detect_providers(self):
-		hf_key = os.getenv("HF_API_KEY") or os.getenv("HUGGINGFACE_API_KEY")
-		ollama_available = False
-		# Prefer explicit env, otherwise probe localhost
-		base = os.getenv("OLLAMA_BASE_URL") or "http://localhost:11434"
-		try:
-			resp = requests.get(base.rstrip("/") + "/api/tags", timeout=1.5)
-			if resp.ok:
-				ollama_available = True
-		except Exception:
-			ollama_available = False
+		# One pass over os.environ per refresh; request setup below reads the snapshot
+		cfg = self.cfg = {k: v for k in _ENV_KEYS if (v := os.environ.get(k))}
+		# Prefer explicit env, otherwise probe localhost (cached for OLLAMA_PROBE_TTL seconds)
+		ollama_available = "OLLAMA_BASE_URL" in cfg or _probe_ollama(
+			self._session, "http://localhost:11434", int(time.time()) // max(1, _OLLAMA_PROBE_TTL)
+		)
 		return {
-			"openai": bool(os.getenv("OPENAI_API_KEY")),
-			"gemini": bool(os.getenv("GEMINI_API_KEY")),
-			"mistral": bool(os.getenv("MISTRAL_API_KEY")),
-			"groq": bool(os.getenv("GROQ_API_KEY")),
-			"hf": bool(hf_key),
-			"perplexity": bool(os.getenv("PERPLEXITY_API_KEY")),
-			"ollama": bool(os.getenv("OLLAMA_BASE_URL")) or ollama_available,
+			"openai": "OPENAI_API_KEY" in cfg,
+			"gemini": "GEMINI_API_KEY" in cfg,
+			"mistral": "MISTRAL_API_KEY" in cfg,
+			"groq": "GROQ_API_KEY" in cfg,
+			"hf": bool(self._get_hf_key()),
+			"perplexity": "PERPLEXITY_API_KEY" in cfg,
+			"ollama": ollama_available,
 			"lovable": True,
 			"stitch": True,
-			"v0": bool(os.getenv("V0_API_KEY") or os.getenv("V0_DEV_API_KEY")),
+			"v0": "V0_API_KEY" in cfg or "V0_DEV_API_KEY" in cfg,
 		}
 
 	def _get_hf_key(self) -> Optional[str]:
-		return os.getenv("HF_API_KEY") or os.getenv("HUGGINGFACE_API_KEY")
+		return self.cfg.get("HF_API_KEY") or self.cfg.get("HUGGINGFACE_API_KEY")
 	def run_tool(self, tool: str, prompt: str) -> Dict[str, Any]:
 		if tool == "v0":
 			try:
@@ -59,20 +373,64 @@ class InferenceRouter:
 		text = self.generate_text(prompt)
 		return {"text": text.get("output", ""), "provider": text.get("provider"), "model": text.get("model")}
 
-	@retry(wait=wait_exponential(multiplier=0.5, min=0.5, max=4), stop=stop_after_attempt(3))
+	def run_tool_batch(self, tool: str, prompts: Sequence[str]) -> List[Dict[str, Any]]:
+		"""`run_tool` over several prompts, in order; v0 prompts share one POST when the server allows."""
+		if tool == "v0" and len(prompts) > 1:
+			try:
+				return self._v0_generate_frontend_batch(prompts)
+			except Exception as e:
+				logger.debug("v0 batch request failed, sending prompts individually: %s", e)
+		return [self.run_tool(tool, prompt) for prompt in prompts]
+
+	@staticmethod
+	def _v0_key(prompt: str) -> str:
+		return LLMCache.key("v0", "frontend_only", "react+tailwind", prompt)
+
+	def _v0_store(self, key: str, result: Dict[str, Any]) -> None:
+		# An empty bundle is treated as a failed generation and retried next time
+		if result["files"]:
+			self._cache.store(key, result)
+
 	def _v0_generate_frontend(self, prompt: str) -> Dict[str, Any]:
-		"""Call v0.dev to generate frontend assets. Requires V0_API_KEY and optional V0_API_BASE."""
-		api_key = os.getenv("V0_API_KEY") or os.getenv("V0_DEV_API_KEY")
-		base = os.getenv("V0_API_BASE", "https://api.v0.dev")
-		url = f"{base}/generate"
-		headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+		"""Call v0.dev to generate frontend assets. Requires V0_API_KEY and optional V0_API_BASE.
+
+		Responses go through the same LLM_CACHE_* response cache as the text providers.
+		"""
+		key = self._v0_key(prompt)
+		hit = self._cache.lookup(key)
+		if hit is not None:
+			return {**hit, "cached": True}
+		ctx = self._http_ctx["v0"]
 		payload = {"task": "frontend_only", "stack": "react+tailwind", "prompt": prompt}
-		resp = requests.post(url, headers=headers, json=payload, timeout=90)
-		resp.raise_for_status()
-		data = resp.json()
+		data = self._post_json(ctx["url"], payload, ctx["headers"], timeout=90)
 		# Expect {files: {path: content, ...}, instructions?: str}
 		files = data.get("files") or {}
-		return {"files": files, "provider": "v0", "model": data.get("model", "free"), "notes": data.get("instructions", "")}
+		result = {"files": files, "provider": "v0", "model": data.get("model", "free"), "notes": data.get("instructions", "")}
+		self._v0_store(key, result)
+		return result
+
+	def _v0_generate_frontend_batch(self, prompts: Sequence[str]) -> List[Dict[str, Any]]:
+		"""One v0 POST carrying every uncached prompt; raises if the response doesn't line up with them."""
+		keys = [self._v0_key(prompt) for prompt in prompts]
+		results: List[Optional[Dict[str, Any]]] = []
+		for key in keys:
+			hit = self._cache.lookup(key)
+			results.append({**hit, "cached": True} if hit is not None else None)
+		misses = [i for i, result in enumerate(results) if result is None]
+		if misses:
+			ctx = self._http_ctx["v0"]
+			payload = {"task": "frontend_only", "stack": "react+tailwind", "prompts": [prompts[i] for i in misses]}
+			data = self._post_json(ctx["url"], payload, ctx["headers"], timeout=90)
+			# Expect {batches: [{files: {...}, instructions?: str}, ...]} in prompt order
+			batches = data.get("batches") if isinstance(data, dict) else None
+			if not isinstance(batches, list) or len(batches) != len(misses):
+				raise ValueError("v0 batch response does not match the prompts")
+			model = data.get("model", "free")
+			for i, b in zip(misses, batches):
+				result = {"files": b.get("files") or {}, "provider": "v0", "model": b.get("model", model), "notes": b.get("instructions", "")}
+				self._v0_store(keys[i], result)
+				results[i] = result
+		return results
 
 	def _available(self, *names):
 		return [n for n in names if self.providers.get(n)]
@@ -82,62 +440,393 @@ class InferenceRouter:
 		if self.providers.get("hf"):
 			try:
 				label, score = self._hf_classify(image)
-				return {"label": label, "confidence": float(score), "provider": "hf", "model": "vit-base-patch16-224", "fallback": False}
+				return {"label": label, "confidence": float(score), "provider": "hf", "model": _VISION_MODEL, "fallback": False}
 			except Exception:
 				pass
+		return self._baseline_classify(image)
+
+	def classify_image_bytes(self, buf: bytes, mime: Optional[str] = None) -> Dict[str, Any]:
+		"""Classify an encoded upload; pixels are only decoded if the local baseline is needed."""
+		if self.providers.get("hf"):
+			try:
+				label, score = self._hf_classify_cached(buf, mime)
+				return {"label": label, "confidence": float(score), "provider": "hf", "model": _VISION_MODEL, "fallback": False}
+			except Exception:
+				pass
+		return self._baseline_classify(decode_image(buf, mime, target_size=self.TARGET_SIZE))
+
+	def classify_image_batch(self, images: List[Image.Image]) -> List[Dict[str, Any]]:
+		"""Classify several images in one call; results are returned in input order."""
+		return [self.classify_image(image) for image in images]
+
+	def classify_image_bytes_batch(self, items: List[Tuple[bytes, Optional[str]]]) -> List[Dict[str, Any]]:
+		"""Batch form of `classify_image_bytes` over (bytes, mime) pairs, in input order.
+
+		Cache misses are sent to HF as one multi-input request; if that request fails or the
+		response doesn't line up with the inputs, each miss is classified individually.
+		"""
+		if len(items) < 2 or not self.providers.get("hf"):
+			return [self.classify_image_bytes(buf, mime) for buf, mime in items]
+		keys = [LLMCache.key("vision", "hf", _VISION_MODEL, buf) for buf, _ in items]
+		try:
+			hits = [self._cache.lookup(key) for key in keys]
+		except CacheMiss:
+			return [self.classify_image_bytes(buf, mime) for buf, mime in items]
+		misses = [i for i, hit in enumerate(hits) if hit is None]
+		batch: Optional[List[Tuple[str, float]]] = None
+		if len(misses) > 1:
+			try:
+				batch = self._hf_classify_many([items[i][0] for i in misses])
+			except Exception as e:
+				logger.debug("HF batch classification failed, classifying individually: %s", e)
+		results: List[Dict[str, Any]] = []
+		pos = {i: n for n, i in enumerate(misses)}
+		for i, (buf, mime) in enumerate(items):
+			if hits[i] is not None:
+				label, score = hits[i]["label"], hits[i]["score"]
+			elif batch is not None:
+				label, score = batch[pos[i]]
+				self._cache.store(keys[i], {"label": label, "score": score})
+			else:
+				results.append(self.classify_image_bytes(buf, mime))
+				continue
+			results.append({"label": label, "confidence": float(score), "provider": "hf", "model": _VISION_MODEL, "fallback": False})
+		return results
+
+	def _baseline_classify(self, image: Image.Image) -> Dict[str, Any]:
 		# Fallback to simple baseline heuristic
-		pixels = image.resize((32, 32))
-		avg = sum(p[0] + p[1] + p[2] for p in pixels.getdata()) / (32 * 32 * 3)
+		pixels = image if image.size == self.TARGET_SIZE else image.resize(self.TARGET_SIZE)
+		if pixels.mode != "RGB":
+			# Alpha or palette/greyscale inputs would skew (or break) a per-RGB-channel mean
+			pixels = pixels.convert("RGB")
+		if np is not None:
+			avg = float(np.asarray(pixels, dtype=np.uint8).mean())
+		else:
+			w, h = self.TARGET_SIZE
+			avg = sum(p[0] + p[1] + p[2] for p in pixels.getdata()) / (w * h * 3)
 		label = "cow" if avg < 128 else "cat"
 		confidence = 0.65
 		provider, model = self._pick_provider_for_vision()
 		return {"label": label, "confidence": confidence, "provider": provider, "model": model, "fallback": True}
 
-	def generate_text(self, prompt: str, preference: Optional[List[str]] = None) -> Dict[str, Any]:
+	def generate_text(
+		self,
+		prompt: str,
+		preference: Optional[Sequence[str]] = None,
+		hedge_delay: Optional[float] = None,
+		max_inflight: Optional[int] = None,
+		kind: str = "text",
+	) -> Dict[str, Any]:
 		"""General text generation with token accounting.
 
 		Provider priority defaults to: gemini → perplexity → hf → mistral → groq → openai → ollama (unless overridden).
+		`hedge_delay=0` races the top `max_inflight` providers from the start; `max_inflight=1` opts out
+		of hedging so providers are tried strictly one after another. `kind` names the latency class
+		("text", "code") whose history sets the adaptive timeouts.
 		"""
-		strategies: List[str] = []
-		if preference:
-			for name in preference:
-				if self.providers.get(name):
-					strategies.append(name)
-		# Default priority per requirement
-		for name in ["gemini", "perplexity", "hf", "mistral", "groq", "openai", "ollama"]:
-			if self.providers.get(name) and name not in strategies:
-				strategies.append(name)
-
-		for name in strategies:
-			try:
-				if name == "gemini":
-					text, tokens = self._gemini_chat(prompt)
-					return {"output": text, "provider": "gemini", "model": "gemini-1.5-flash", "tokens": tokens, "fallback": False}
-				if name == "perplexity":
-					text, tokens = self._perplexity_chat(prompt)
-					return {"output": text, "provider": "perplexity", "model": "sonar-small-chat", "tokens": tokens, "fallback": False}
-				if name == "hf":
-					text, tokens = self._hf_generate_text(prompt)
-					return {"output": text, "provider": "hf", "model": "Qwen2.5-7B-Instruct (inference)", "tokens": tokens, "fallback": False}
-				if name == "mistral":
-					text, tokens = self._mistral_chat(prompt)
-					return {"output": text, "provider": "mistral", "model": "mistral-small-latest", "tokens": tokens, "fallback": False}
-				if name == "groq":
-					text, tokens = self._groq_chat(prompt)
-					return {"output": text, "provider": "groq", "model": "llama-3.1-8b-instant", "tokens": tokens, "fallback": False}
-				if name == "openai":
-					text, tokens = self._openai_chat(prompt)
-					return {"output": text, "provider": "openai", "model": "gpt-4o-mini", "tokens": tokens, "fallback": False}
-				if name == "ollama":
-					text, tokens = self._ollama_chat(prompt)
-					return {"output": text, "provider": "ollama", "model": "codellama", "tokens": tokens, "fallback": False}
-			except Exception:
-				continue
+		result = self._first_success(self._strategies(preference), prompt, hedge_delay, max_inflight, kind)
+		if result is not None:
+			return result
 
 		provider, model = self._pick_provider_for_codegen()
 		output = f"[baseline] You asked: {prompt}"
 		return {"output": output, "provider": provider, "model": model, "tokens": len(output) // 4, "fallback": True}
 
+	def generate_text_batch(
+		self,
+		prompts: Sequence[str],
+		preference: Optional[Sequence[str]] = None,
+		hedge_delay: Optional[float] = None,
+		max_inflight: Optional[int] = None,
+	) -> List[Dict[str, Any]]:
+		"""`generate_text` for several independent prompts, results in input order.
+
+		Prompts are issued concurrently from a long-lived worker pool over the shared session
+		(multiplexed on one connection under HTTP/2); each keeps its own cache lookup and hedged
+		provider fallback, with `hedge_delay`/`max_inflight` applied to every prompt.
+		"""
+		def one(p: str) -> Dict[str, Any]:
+			return self.generate_text(p, preference, hedge_delay, max_inflight)
+
+		if len(prompts) < 2:
+			return [one(p) for p in prompts]
+		with self._pools_lock:
+			pool = self._batch_pool
+			if pool is None:
+				pool = self._batch_pool = ThreadPoolExecutor(max_workers=self.provider_pool_size, thread_name_prefix="gen-batch")
+		return list(pool.map(one, prompts))
+
+	async def agenerate_text(
+		self,
+		prompt: str,
+		preference: Optional[Sequence[str]] = None,
+		hedge_delay: Optional[float] = None,
+		max_inflight: Optional[int] = None,
+	) -> Dict[str, Any]:
+		"""Awaitable `generate_text` for async callers.
+
+		Provider calls and their retry backoff sleeps run on a worker thread, so retries never
+		block the event loop while other requests are in flight.
+		"""
+		return await asyncio.to_thread(self.generate_text, prompt, preference, hedge_delay, max_inflight)
+
+	def generate_text_stream(
+		self,
+		prompt: str,
+		preference: Optional[Sequence[str]] = None,
+		served: Optional[Dict[str, Any]] = None,
+	) -> Iterator[str]:
+		"""Yield output chunks as they are generated by the first streaming-capable provider.
+
+		A provider that fails (or sends nothing) before its first chunk is skipped. Without any
+		streaming provider the full `generate_text` output (including the baseline) is yielded as
+		a single chunk. Completed streams are stored in the response cache under the same key as
+		`generate_text`. `served`, when given, is filled with the provider and model used.
+		"""
+		info = served if served is not None else {}
+		for name in self._strategies(preference):
+			if (name not in _SSE_ENDPOINTS and name != "ollama") or not self._breaker_allows(name):
+				continue
+			model = _TEXT_MODELS[name]
+			key = LLMCache.key("text", name, model, str(_TEMPERATURE), prompt)
+			try:
+				try:
+					hit = self._cache.lookup(key)
+				except CacheMiss:
+					continue
+				if hit is not None:
+					info.update(provider=name, model=model, fallback=False, cached=True)
+					yield hit["output"]
+					return
+				chunks = self._stream_provider(name, prompt)
+				try:
+					first = next(chunks)
+				except Exception:
+					# StopIteration included: an empty stream counts as a failed call
+					self._breaker_record(name, ok=False)
+					continue
+				info.update(provider=name, model=model, fallback=False)
+				parts = [first]
+				yield first
+				try:
+					for chunk in chunks:
+						parts.append(chunk)
+						yield chunk
+				except Exception:
+					self._breaker_record(name, ok=False)
+					raise
+				self._breaker_record(name, ok=True)
+				output = "".join(parts)
+				self._cache.store(key, {"output": output, "provider": name, "model": model, "tokens": len(output) // 4, "fallback": False})
+				return
+			finally:
+				# Cache hits, replay misses and streams the client abandoned never record a result
+				self._breaker_release(name)
+		result = self.generate_text(prompt, preference=preference)
+		info.update(provider=result.get("provider"), model=result.get("model"), fallback=result.get("fallback", False))
+		yield result["output"]
+
+	def _strategies(self, preference: Optional[Sequence[str]]) -> Sequence[str]:
+		# Order-preserving merge of the caller's preference with the precomputed default order
+		if preference:
+			return list(dict.fromkeys([n for n in preference if n in self._available_set and n in self._dispatch] + list(self._text_order)))
+		return self._text_order
+
+	def _stream_provider(self, name: str, prompt: str) -> Iterator[str]:
+		if name == "ollama":
+			ctx = self._http_ctx["ollama"]
+			payload = {"model": _TEXT_MODELS["ollama"], "prompt": prompt, "stream": True}
+			with self._session.post(ctx["url"], headers=ctx["headers"], data=orjson.dumps(payload), timeout=60, stream=True) as resp:
+				resp.raise_for_status()
+				# NDJSON: one object per line until "done"
+				for line in resp.iter_lines():
+					if not line:
+						continue
+					data = orjson.loads(line)
+					if data.get("response"):
+						yield data["response"]
+					if data.get("done"):
+						return
+			return
+		ctx = self._http_ctx[name]
+		messages = [{"role": "user", "content": prompt}]
+		if name == "openai":
+			messages.insert(0, {"role": "system", "content": "You are a helpful coding assistant."})
+		payload = {"model": _TEXT_MODELS[name], "messages": messages, "temperature": _TEMPERATURE, "stream": True}
+		with self._session.post(ctx["url"], headers=ctx["stream_headers"], data=orjson.dumps(payload), timeout=60, stream=True) as resp:
+			resp.raise_for_status()
+			for line in resp.iter_lines():
+				if not line.startswith(b"data:"):
+					continue
+				data = line[5:].strip()
+				if data == b"[DONE]":
+					return
+				choices = orjson.loads(data).get("choices") or []
+				delta = (choices[0].get("delta") or {}).get("content") if choices else None
+				if delta:
+					yield delta
+
+	def _call_provider(self, name: str, prompt: str, kind: str = "text") -> Dict[str, Any]:
+		key = LLMCache.key("text", name, _TEXT_MODELS.get(name, ""), str(_TEMPERATURE), prompt)
+		try:
+			hit = self._cache.lookup(key)
+			if hit is not None:
+				return {**hit, "cached": True}
+			try:
+				result = self._call_provider_uncached(name, prompt, kind)
+			except Exception:
+				self._breaker_record(name, ok=False)
+				raise
+			self._breaker_record(name, ok=True)
+			self._cache.store(key, result)
+			return result
+		finally:
+			# A cache hit or replay-mode CacheMiss never reached the provider
+			self._breaker_release(name)
+
+	def _submit_bulkheaded(self, name: str, prompt: str, kind: str = "text") -> Optional["Future[Dict[str, Any]]"]:
+		"""Run a provider call on its own pool, or return None when all its workers are busy."""
+		with self._pools_lock:
+			if self._inflight.get(name, 0) >= self.provider_pool_size:
+				return None
+			pool = self._pools.get(name)
+			if pool is None:
+				pool = self._pools[name] = ThreadPoolExecutor(max_workers=self.provider_pool_size, thread_name_prefix=f"prov-{name}")
+			self._inflight[name] = self._inflight.get(name, 0) + 1
+		fut = pool.submit(self._call_provider, name, prompt, kind)
+		fut.add_done_callback(lambda _f: self._release_bulkhead(name))
+		return fut
+
+	def _release_bulkhead(self, name: str) -> None:
+		with self._pools_lock:
+			self._inflight[name] -= 1
+
+	def _breaker_allows(self, name: str) -> bool:
+		"""Closed: allow. Open: skip until the cooldown ends, then allow a single half-open trial."""
+		with self._breaker_lock:
+			state = self._breaker.get(name)
+			if state is None or not state["opened_at"]:
+				return True
+			if state["half_open"] or time.monotonic() < state["opened_at"] + state["cooldown"]:
+				return False
+			state["half_open"] = True
+			return True
+
+	def _breaker_release(self, name: str) -> None:
+		"""Hand back a half-open trial that ended without a provider call, so the next one can run."""
+		with self._breaker_lock:
+			state = self._breaker.get(name)
+			if state is not None:
+				state["half_open"] = False
+
+	def _breaker_record(self, name: str, ok: bool) -> None:
+		with self._breaker_lock:
+			if ok:
+				self._breaker.pop(name, None)
+				return
+			state = self._breaker.setdefault(name, {"failures": 0, "trips": 0, "opened_at": 0.0, "cooldown": 0.0, "half_open": False})
+			state["failures"] += 1
+			if state["half_open"] or state["failures"] >= _BREAKER_THRESHOLD:
+				state["trips"] += 1
+				state["cooldown"] = min(_BREAKER_MAX_COOLDOWN, 4.0 ** (state["trips"] - 1))
+				state["opened_at"] = time.monotonic()
+				state["half_open"] = False
+				logger.warning("provider %s circuit open for %.0fs after %d failures", name, state["cooldown"], state["failures"])
+
+	def _call_provider_uncached(self, name: str, prompt: str, kind: str = "text") -> Dict[str, Any]:
+		chat = self._dispatch.get(name)
+		if chat is None:
+			raise ValueError(f"unknown text provider: {name}")
+		started = time.monotonic()
+		try:
+			text, tokens = chat(prompt, timeout=self._timeout_for(name, kind))
+		except requests.Timeout:
+			# A timed-out call is a sample too, at least as long as it ran, so the p95 can grow back
+			self._record_latency(name, kind, time.monotonic() - started)
+			raise
+		self._record_latency(name, kind, time.monotonic() - started)
+		return {"output": text, "provider": name, "model": _TEXT_MODELS[name], "tokens": tokens, "fallback": False}
+
+	def _record_latency(self, name: str, kind: str, seconds: float) -> None:
+		with self._breaker_lock:
+			self._latency.setdefault((name, kind), deque(maxlen=100)).append(seconds)
+
+	def _latency_p95(self, name: str, kind: str = "text") -> Optional[float]:
+		"""Rolling p95 of the provider's call durations for `kind`, or None below 10 samples."""
+		with self._breaker_lock:
+			samples = sorted(self._latency.get((name, kind), ()))
+		if len(samples) < _TIMEOUT_MIN_SAMPLES:
+			return None
+		return samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+
+	def _timeout_for(self, name: str, kind: str = "text") -> float:
+		"""Request timeout just above the provider's rolling p95 latency (60s until 10 samples exist)."""
+		p95 = self._latency_p95(name, kind)
+		if p95 is None:
+			return _DEFAULT_TIMEOUT
+		return min(_DEFAULT_TIMEOUT, max(2.0, 1.3 * p95))
+
+	def _hedge_delay_for(self, name: str, kind: str = "text") -> float:
+		"""Seconds to wait on `name` before hedging: its p95, so only slow-tail calls get a second provider."""
+		p95 = self._latency_p95(name, kind)
+		return _HEDGE_COLD_DELAY if p95 is None else p95
+
+	def _first_success(
+		self,
+		strategies: Sequence[str],
+		prompt: str,
+		hedge_delay: Optional[float] = None,
+		max_inflight: Optional[int] = None,
+		kind: str = "text",
+	) -> Optional[Dict[str, Any]]:
+		"""Hedged fallback over `strategies` in order, returning the first successful result.
+
+		The next provider is started as soon as one fails, or when none has answered within
+		`hedge_delay` seconds (up to `max_inflight` concurrent calls; both default to the router's
+		settings, and without LLM_HEDGE_DELAY the delay is the latest provider's rolling p95).
+		Slower calls still in flight are left to finish in the background and their results are
+		discarded.
+		"""
+		delay = self.hedge_delay if hedge_delay is None else max(0.0, hedge_delay)
+		limit = self.hedge_max_inflight if max_inflight is None else max(1, max_inflight)
+		remaining = iter(strategies)
+		pending = set()
+		latest = ""
+
+		def launch() -> bool:
+			nonlocal latest
+			# Providers with an open circuit or a saturated bulkhead are skipped without a call
+			for name in remaining:
+				if not self._breaker_allows(name):
+					continue
+				fut = self._submit_bulkheaded(name, prompt, kind)
+				if fut is None:
+					# Never called, so a half-open trial granted just now goes back unused
+					self._breaker_release(name)
+					continue
+				pending.add(fut)
+				latest = name
+				return True
+			return False
+
+		launch()
+		exhausted = False
+		while pending:
+			can_hedge = not exhausted and len(pending) < limit
+			timeout = (delay if delay is not None else self._hedge_delay_for(latest, kind)) if can_hedge else None
+			done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+			if not done:
+				exhausted = not launch()
+				continue
+			for fut in done:
+				pending.discard(fut)
+				if fut.exception() is None:
+					return fut.result()
+				# Failed provider: replace it with the next one immediately
+				if not exhausted:
+					exhausted = not launch()
+		return None
+
 	def generate_code(self, instruction: str) -> Dict[str, Any]:
 		"""Ask providers (in required priority) to return a JSON object mapping file paths to contents.
 
@@ -148,67 +837,96 @@ class InferenceRouter:
 			"Do not include explanations. "
 			f"Instruction: {instruction}"
 		)
-		result = self.generate_text(prompt, preference=["gemini", "perplexity", "hf", "mistral", "groq", "openai"])  # priority enforced
+		# Long, expensive output: never bill a second provider for the same files
+		result = self.generate_text(prompt, preference=["gemini", "perplexity", "hf", "mistral", "groq", "openai"], max_inflight=1, kind="code")  # priority enforced
 		text = result.get("output", "{}")
 		files: Dict[str, str] = {}
 		try:
 			files = self._parse_files_json(text)
 		except Exception:
 			# attempt to find JSON in code fences
-			import re, json as _json
-			m = re.search(r"```(?:json)?\n([\s\S]*?)```", text)
-			if m:
-				files = _json.loads(m.group(1))
+			fenced = _fenced_block(text)
+			if fenced is not None:
+				try:
+					files = self._parse_files_json(fenced)
+				except Exception:
+					files = {}
 		result["files"] = files
 		return result
 
 	def _parse_files_json(self, text: str) -> Dict[str, str]:
-		import json as _json
-		data = _json.loads(text)
-		if not isinstance(data, dict):
-			raise ValueError("files payload is not a dict")
-		return {str(k): str(v) for k, v in data.items()}
+		return dict(_parse_files_payload(text))
+
+	def _post_json(self, url: str, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None, timeout: float = 60) -> Any:
+		"""POST an orjson-encoded body (headers must carry the JSON content type) and decode with orjson."""
+		resp = self._session.post(url, headers=headers or _JSON_HEADERS, data=orjson.dumps(payload), timeout=timeout)
+		resp.raise_for_status()
+		return orjson.loads(resp.content)
 
 	def _pick_provider_for_vision(self):
-		order = ["openai", "gemini", "groq", "hf", "ollama"]
-		for name in order:
-			if self.providers.get(name):
-				return name, "auto"
-		return "local", "baseline"
+		return self._vision_pick
 
 	def _pick_provider_for_codegen(self):
-		order = ["openai", "mistral", "groq", "hf", "ollama"]
-		for name in order:
-			if self.providers.get(name):
-				return name, "auto"
-		return "local", "baseline"
+		return self._codegen_pick
 
-	@retry(wait=wait_exponential(multiplier=0.5, min=0.5, max=4), stop=stop_after_attempt(3))
 	def _hf_classify(self, image: Image.Image):
-		api_key = self._get_hf_key()
-		headers = {"Authorization": f"Bearer {api_key}"}
-		# Use a general image classification model
-		url = "https://api-inference.huggingface.co/models/google/vit-base-patch16-224"
+		return self._hf_classify_cached(self._hf_jpeg(image), "image/jpeg")
+
+	def _hf_jpeg(self, image: Image.Image) -> bytes:
+		# ViT-224 resizes server-side anyway: send a 224px JPEG rather than a full-size PNG
+		memo = self._jpeg_memo.get(id(image))
+		if memo is not None and memo[0]() is image:
+			return memo[1]
+		thumb = image.convert("RGB")
+		thumb.thumbnail((224, 224), Image.BILINEAR)
 		buf = io.BytesIO()
-		image.save(buf, format="PNG")
-		resp = requests.post(url, headers=headers, data=buf.getvalue(), timeout=60)
+		thumb.save(buf, format="JPEG", quality=85, optimize=False)
+		data = buf.getvalue()
+		key = id(image)
+		self._jpeg_memo[key] = (weakref.ref(image, lambda _r: self._jpeg_memo.pop(key, None)), data)
+		return data
+
+	def _hf_classify_cached(self, data: bytes, content_type: Optional[str] = None):
+		key = LLMCache.key("vision", "hf", _VISION_MODEL, data)
+		hit = self._cache.lookup(key)
+		if hit is not None:
+			return hit["label"], hit["score"]
+		label, score = self._hf_classify_bytes(data, content_type)
+		self._cache.store(key, {"label": label, "score": score})
+		return label, score
+
+	def _hf_classify_many(self, images: List[bytes]) -> List[Tuple[str, float]]:
+		"""Classify several encoded images in one HF request (base64 `inputs` array)."""
+		ctx = self._http_ctx["hf_vision"]
+		payload = {"inputs": [base64.b64encode(img).decode("ascii") for img in images]}
+		data = self._post_json(ctx["url"], payload, ctx["headers"], timeout=60)
+		if not isinstance(data, list) or len(data) != len(images) or not all(isinstance(p, list) and p for p in data):
+			raise ValueError("unexpected batch response shape")
+		out = []
+		for preds in data:
+			best = max(preds, key=lambda x: x.get("score", 0))
+			out.append((best.get("label", "unknown"), best.get("score", 0.0)))
+		return out
+
+	def _hf_classify_bytes(self, data: bytes, content_type: Optional[str] = None):
+		ctx = self._http_ctx["hf_vision"]
+		# General image classification model; it accepts any encoded image format as the body
+		headers = {"Authorization": ctx["headers"]["Authorization"]}
+		if content_type:
+			headers["Content-Type"] = content_type
+		resp = self._session.post(ctx["url"], headers=headers, data=data, timeout=60)
 		resp.raise_for_status()
-		data = resp.json()
+		data = orjson.loads(resp.content)
 		# HF may return nested lists
 		preds = data[0] if isinstance(data, list) and data and isinstance(data[0], list) else data
 		best = max(preds, key=lambda x: x.get("score", 0))
 		return best.get("label", "unknown"), best.get("score", 0.0)
 
-	@retry(wait=wait_exponential(multiplier=0.5, min=0.5, max=4), stop=stop_after_attempt(3))
-	def _hf_generate_text(self, prompt: str) -> Tuple[str, int]:
-		api_key = os.getenv("HF_API_KEY")
-		headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+	def _hf_generate_text(self, prompt: str, timeout: float = 60) -> Tuple[str, int]:
 		# Use instruct-tuned model for text generation
-		url = "https://api-inference.huggingface.co/models/Qwen/Qwen2.5-7B-Instruct"
+		ctx = self._http_ctx["hf"]
 		payload = {"inputs": prompt, "parameters": {"max_new_tokens": 256, "temperature": 0.3}}
-		resp = requests.post(url, headers=headers, json=payload, timeout=60)
-		resp.raise_for_status()
-		data = resp.json()
+		data = self._post_json(ctx["url"], payload, ctx["headers"], timeout=timeout)
 		text = (
 			data[0]["generated_text"]
 			if isinstance(data, list) and data and "generated_text" in data[0]
@@ -216,68 +934,48 @@ class InferenceRouter:
 		)
 		return text, len(text) // 4
 
-	@retry(wait=wait_exponential(multiplier=0.5, min=0.5, max=4), stop=stop_after_attempt(3))
-	def _openai_chat(self, prompt: str) -> Tuple[str, int]:
-		api_key = os.getenv("OPENAI_API_KEY")
-		headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-		url = "https://api.openai.com/v1/chat/completions"
+	def _openai_chat(self, prompt: str, timeout: float = 60) -> Tuple[str, int]:
+		ctx = self._http_ctx["openai"]
 		payload = {
 			"model": "gpt-4o-mini",
 			"messages": [
 				{"role": "system", "content": "You are a helpful coding assistant."},
 				{"role": "user", "content": prompt},
 			],
-			"temperature": 0.2,
+			"temperature": _TEMPERATURE,
 		}
-		resp = requests.post(url, headers=headers, json=payload, timeout=60)
-		resp.raise_for_status()
-		data = resp.json()
+		data = self._post_json(ctx["url"], payload, ctx["headers"], timeout=timeout)
 		text = data["choices"][0]["message"]["content"].strip()
 		tokens = int(data.get("usage", {}).get("total_tokens", 0))
 		if not tokens:
 			tokens = len(text) // 4
 		return text, tokens
 
-	@retry(wait=wait_exponential(multiplier=0.5, min=0.5, max=4), stop=stop_after_attempt(3))
-	def _mistral_chat(self, prompt: str) -> Tuple[str, int]:
-		api_key = os.getenv("MISTRAL_API_KEY")
-		headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-		url = "https://api.mistral.ai/v1/chat/completions"
-		payload = {"model": "mistral-small-latest", "messages": [{"role":"user","content": prompt}], "temperature": 0.2}
-		resp = requests.post(url, headers=headers, json=payload, timeout=60)
-		resp.raise_for_status()
-		data = resp.json()
+	def _mistral_chat(self, prompt: str, timeout: float = 60) -> Tuple[str, int]:
+		ctx = self._http_ctx["mistral"]
+		payload = {"model": "mistral-small-latest", "messages": [{"role":"user","content": prompt}], "temperature": _TEMPERATURE}
+		data = self._post_json(ctx["url"], payload, ctx["headers"], timeout=timeout)
 		text = data["choices"][0]["message"]["content"].strip()
 		tokens = int(data.get("usage", {}).get("total_tokens", 0)) if isinstance(data.get("usage"), dict) else 0
 		if not tokens:
 			tokens = len(text) // 4
 		return text, tokens
 
-	@retry(wait=wait_exponential(multiplier=0.5, min=0.5, max=4), stop=stop_after_attempt(3))
-	def _groq_chat(self, prompt: str) -> Tuple[str, int]:
-		api_key = os.getenv("GROQ_API_KEY")
-		headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+	def _groq_chat(self, prompt: str, timeout: float = 60) -> Tuple[str, int]:
 		# Groq is OpenAI-compatible endpoint
-		url = "https://api.groq.com/openai/v1/chat/completions"
-		payload = {"model": "llama-3.1-8b-instant", "messages": [{"role":"user","content": prompt}], "temperature": 0.2}
-		resp = requests.post(url, headers=headers, json=payload, timeout=60)
-		resp.raise_for_status()
-		data = resp.json()
+		ctx = self._http_ctx["groq"]
+		payload = {"model": "llama-3.1-8b-instant", "messages": [{"role":"user","content": prompt}], "temperature": _TEMPERATURE}
+		data = self._post_json(ctx["url"], payload, ctx["headers"], timeout=timeout)
 		text = data["choices"][0]["message"]["content"].strip()
 		tokens = int(data.get("usage", {}).get("total_tokens", 0)) if isinstance(data.get("usage"), dict) else 0
 		if not tokens:
 			tokens = len(text) // 4
 		return text, tokens
 
-	@retry(wait=wait_exponential(multiplier=0.5, min=0.5, max=4), stop=stop_after_attempt(3))
-	def _gemini_chat(self, prompt: str) -> Tuple[str, int]:
-		api_key = os.getenv("GEMINI_API_KEY")
-		headers = {"Content-Type": "application/json"}
-		url = f"https://generativelanguage.googleapis.com/v1/models/gemini-1.5-flash:generateContent?key={api_key}"
-		payload = {"contents": [{"parts": [{"text": prompt}]}], "generationConfig": {"temperature": 0.2}}
-		resp = requests.post(url, headers=headers, json=payload, timeout=60)
-		resp.raise_for_status()
-		data = resp.json()
+	def _gemini_chat(self, prompt: str, timeout: float = 60) -> Tuple[str, int]:
+		ctx = self._http_ctx["gemini"]
+		payload = {"contents": [{"parts": [{"text": prompt}]}], "generationConfig": {"temperature": _TEMPERATURE}}
+		data = self._post_json(ctx["url"], payload, ctx["headers"], timeout=timeout)
 		# Parse text from candidates
 		cands = data.get("candidates", [])
 		if not cands:
@@ -289,29 +987,20 @@ class InferenceRouter:
 			tokens = len(text) // 4
 		return text, tokens
 
-	@retry(wait=wait_exponential(multiplier=0.5, min=0.5, max=4), stop=stop_after_attempt(3))
-	def _perplexity_chat(self, prompt: str) -> Tuple[str, int]:
-		api_key = os.getenv("PERPLEXITY_API_KEY")
-		headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-		url = "https://api.perplexity.ai/chat/completions"
-		payload = {"model": "sonar-small-chat", "messages": [{"role":"user","content": prompt}], "temperature": 0.2}
-		resp = requests.post(url, headers=headers, json=payload, timeout=60)
-		resp.raise_for_status()
-		data = resp.json()
+	def _perplexity_chat(self, prompt: str, timeout: float = 60) -> Tuple[str, int]:
+		ctx = self._http_ctx["perplexity"]
+		payload = {"model": "sonar-small-chat", "messages": [{"role":"user","content": prompt}], "temperature": _TEMPERATURE}
+		data = self._post_json(ctx["url"], payload, ctx["headers"], timeout=timeout)
 		text = data["choices"][0]["message"]["content"].strip()
 		tokens = int(data.get("usage", {}).get("total_tokens", 0)) if isinstance(data.get("usage"), dict) else 0
 		if not tokens:
 			tokens = len(text) // 4
 		return text, tokens
 
-	@retry(wait=wait_exponential(multiplier=0.5, min=0.5, max=4), stop=stop_after_attempt(3))
-	def _ollama_chat(self, prompt: str) -> Tuple[str, int]:
-		base = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-		url = f"{base}/api/generate"
+	def _ollama_chat(self, prompt: str, timeout: float = 60) -> Tuple[str, int]:
+		ctx = self._http_ctx["ollama"]
 		payload = {"model": "codellama", "prompt": prompt, "stream": False}
-		resp = requests.post(url, json=payload, timeout=60)
-		resp.raise_for_status()
-		data = resp.json()
+		data = self._post_json(ctx["url"], payload, ctx["headers"], timeout=timeout)
 		text = data.get("response", "")
 		return text, len(text) // 4
 
@@ -1,10 +1,13 @@
 from __future__ import annotations
 from typing import Dict, Any, List
-from datetime import datetime
 import os
-import json
+import time
+
+import orjson
 
 from .adapters import InferenceRouter
+from .clock import utc_iso
+from .file_writer import slugify, write_file, write_files
 from .storage import DatabaseService
 from .rag import RagService
 
@@ -13,14 +16,14 @@ class AgentOrchestrator:
 	def __init__(self, base_dir: str = "runs") -> None:
 		self.router = InferenceRouter()
 		self.db = DatabaseService()
-		self.rag = RagService(self.db)
 		self.base_dir = base_dir
 		os.makedirs(self.base_dir, exist_ok=True)
+		# Own index file so it doesn't race the API's RagService when both save on shutdown
+		self.rag = RagService(self.db, index_path=os.path.join(base_dir, "rag.faiss"))
 
 	def _mk_run_dir(self, title: str) -> str:
-		ts = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
-		slug = "".join(c for c in title.lower() if c.isalnum() or c in ("-","_"," ")).strip().replace(" ", "-")
-		path = os.path.join(self.base_dir, f"{ts}-{slug[:40]}")
+		ts = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+		path = os.path.join(self.base_dir, f"{ts}-{slugify(title)}")
 		os.makedirs(path, exist_ok=True)
 		return path
 
@@ -32,7 +35,7 @@ class AgentOrchestrator:
 
 		def log(stage: str, success: bool, message: str, metadata: Dict[str, Any]):
 			entry = {
-				"timestamp": datetime.utcnow().isoformat(),
+				"timestamp": utc_iso(),
 				"stage": stage,
 				"success": success,
 				"message": message,
@@ -41,61 +44,52 @@ class AgentOrchestrator:
 			logs.append(entry)
 			self.db.save_log(stage=stage, provider=metadata.get("provider"), model=metadata.get("model"), success=success, message=message, metadata=metadata)
 
-		# Requirements (prefer gemini/perplexity)
-		req = self.router.generate_text(
-			f"Extract concise functional/non-functional requirements, constraints, acceptance criteria for: {prompt}",
-			preference=["gemini","perplexity"],
-		)
-		self._write_text(os.path.join(run_dir, "requirements.md"), req.get("output", ""))
-		log("requirements", True, "requirements extracted", req)
+		# Artifacts are collected as run-relative paths and written in one batch after all stages
+		outputs: Dict[str, str] = {}
 
-		# Design (prefer gemini/perplexity)
-		design = self.router.generate_text(
-			f"Create a Mermaid system diagram and an OpenAPI high-level outline for: {prompt}",
-			preference=["gemini","perplexity"],
-		)
-		self._write_text(os.path.join(run_dir, "design.md"), design.get("output", ""))
+		# Requirements and design only depend on the prompt, so both provider calls run concurrently
+		req, design = self._plan(prompt)
+		outputs["requirements.md"] = req.get("output", "")
+		log("requirements", True, "requirements extracted", req)
+		outputs["design.md"] = design.get("output", "")
 		log("design", True, "design generated", design)
 
 		# Build (scaffold minimal runnable app tailored to prompt)
-		backend_dir = os.path.join(run_dir, "backend")
-		frontend_dir = os.path.join(run_dir, "frontend")
-		os.makedirs(backend_dir, exist_ok=True)
-		os.makedirs(frontend_dir, exist_ok=True)
-		self._write_text(os.path.join(backend_dir, "main.py"), self._template_fastapi(prompt))
+		outputs["backend/main.py"] = self._template_fastapi(prompt)
 		# Attempt v0.dev frontend generation when key present, fallback to minimal UI
 		files = None
+		v0_prompts = [f"TASK: frontend_only\nSTACK: react + tailwind\nOUTCOME: '{prompt}'"]
 		try:
 			if self.router.providers.get("v0"):
-				resp = self.router.run_tool("v0", f"TASK: frontend_only\nSTACK: react + tailwind\nOUTCOME: '{prompt}'")
+				# All v0-bound prompts go out together (one POST when there is more than one)
+				resp = self.router.run_tool_batch("v0", v0_prompts)[0]
 				files = resp.get("files") if isinstance(resp, dict) else None
 		except Exception:
 			files = None
 		if files:
 			for path, content in files.items():
-				fpath = os.path.join(frontend_dir, path)
-				os.makedirs(os.path.dirname(fpath), exist_ok=True)
-				self._write_text(fpath, content)
+				outputs[os.path.join("frontend", path)] = content
 		else:
-			self._write_text(os.path.join(frontend_dir, "app.py"), self._template_streamlit(prompt))
+			outputs["frontend/app.py"] = self._template_streamlit(prompt)
 		log("build", True, "scaffold created", {"provider": req.get("provider"), "model": req.get("model")})
 
 		# Tests
-		tests_dir = os.path.join(run_dir, "tests")
-		os.makedirs(tests_dir, exist_ok=True)
-		self._write_text(os.path.join(tests_dir, "test_smoke.py"), self._template_test())
+		outputs["tests/test_smoke.py"] = self._template_test()
 		log("test", True, "tests scaffolded", {})
 
 		# Deploy
-		self._write_text(os.path.join(run_dir, "Dockerfile"), self._template_dockerfile())
-		self._write_text(os.path.join(run_dir, "docker-compose.yml"), self._template_compose())
+		outputs["Dockerfile"] = self._template_dockerfile()
+		outputs["docker-compose.yml"] = self._template_compose()
 		log("deploy", True, "deploy artifacts created", {})
 
 		# Docs
-		self._write_text(os.path.join(run_dir, "README.md"), self._template_readme(prompt))
+		outputs["README.md"] = self._template_readme(prompt)
 		log("docs", True, "readme generated", {})
 
+		write_files(run_dir, outputs)
+
 		self.rag.index_text(f"Run for: {prompt}")
+		self.rag.flush()
 
 		report = {
 			"summary": "Autonomous build scaffolded successfully",
@@ -119,13 +113,32 @@ class AgentOrchestrator:
 			"logs": logs,
 			"nextActions": ["Customize generated code to your domain needs"]
 		}
-		self._write_text(os.path.join(run_dir, "run_report.json"), json.dumps(report, indent=2))
+		write_file(os.path.join(run_dir, "run_report.json"), orjson.dumps(report, option=orjson.OPT_INDENT_2))
 		return report
 
-	def _write_text(self, path: str, content: str) -> None:
-		os.makedirs(os.path.dirname(path), exist_ok=True)
-		with open(path, "w", encoding="utf-8") as f:
-			f.write(content)
+	def close(self) -> None:
+		self.rag.save()
+		self.router.close()
+
+	def _plan(self, prompt: str) -> List[Dict[str, Any]]:
+		"""Requirements and design responses, each behind its stage's semantic cache.
+
+		Cache lookups are keyed on the user prompt alone; the misses go to the providers as one
+		concurrent batch. Local fallbacks are never cached.
+		"""
+		stages = (
+			("requirements", f"Extract concise functional/non-functional requirements, constraints, acceptance criteria for: {prompt}"),
+			("design", f"Create a Mermaid system diagram and an OpenAPI high-level outline for: {prompt}"),
+		)
+		results = [self.rag.semantic_cache_lookup(stage, prompt) for stage, _ in stages]
+		misses = [i for i, hit in enumerate(results) if hit is None]
+		# Prefer gemini/perplexity for both planning stages; long outputs, so no hedged second provider
+		fresh = self.router.generate_text_batch([stages[i][1] for i in misses], preference=["gemini", "perplexity"], max_inflight=1)
+		for i, resp in zip(misses, fresh):
+			results[i] = resp
+			if not resp.get("fallback"):
+				self.rag.semantic_cache_put(stages[i][0], prompt, resp)
+		return results
 
 	def _template_fastapi(self, prompt: str) -> str:
 		return """
@@ -0,0 +1,191 @@
+from __future__ import annotations
+from typing import Any, Callable, List, Optional, Set, Tuple
+import asyncio
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+	"""Coalesce concurrent async submissions into batched calls of a blocking function.
+
+	Items arriving within `max_latency_ms` of the first queued item (up to `max_batch`)
+	are passed together to `fn(items) -> results`, which runs in the default executor.
+	"""
+
+	def __init__(self, fn: Callable[[List[Any]], List[Any]], max_batch: int = 16, max_latency_ms: float = 10.0) -> None:
+		self._fn = fn
+		self.max_batch = max(1, int(max_batch))
+		self.max_latency = max(0.0, float(max_latency_ms)) / 1000.0
+		self._loop: Optional[asyncio.AbstractEventLoop] = None
+		self._queue: Optional[asyncio.Queue] = None
+		self._worker: Optional[asyncio.Task] = None
+		# Strong references to running dispatches; the loop itself only keeps weak ones
+		self._inflight: Set[asyncio.Task] = set()
+
+	def start(self) -> None:
+		"""Start the worker on the running loop (idempotent; restarts if the loop changed)."""
+		loop = asyncio.get_running_loop()
+		if self._loop is loop and self._worker is not None and not self._worker.done():
+			return
+		self._loop = loop
+		self._queue = asyncio.Queue()
+		self._worker = loop.create_task(self._run())
+
+	async def stop(self) -> None:
+		"""Stop collecting, wait for dispatched batches to finish and fail anything still queued."""
+		worker, queue = self._worker, self._queue
+		self._worker = None
+		if worker is not None and not worker.done():
+			worker.cancel()
+			try:
+				await worker
+			except asyncio.CancelledError:
+				pass
+		if self._inflight:
+			await asyncio.gather(*self._inflight, return_exceptions=True)
+		while queue is not None and not queue.empty():
+			_, fut = queue.get_nowait()
+			if not fut.done():
+				fut.set_exception(RuntimeError("batcher stopped"))
+
+	async def submit(self, item: Any) -> Any:
+		self.start()
+		fut = self._loop.create_future()
+		await self._queue.put((item, fut))
+		return await fut
+
+	async def _run(self) -> None:
+		loop = asyncio.get_running_loop()
+		queue = self._queue
+		while True:
+			batch: List[Tuple[Any, asyncio.Future]] = [await queue.get()]
+			deadline = loop.time() + self.max_latency
+			while len(batch) < self.max_batch:
+				if not queue.empty():
+					batch.append(queue.get_nowait())
+					continue
+				timeout = deadline - loop.time()
+				if timeout <= 0:
+					break
+				try:
+					batch.append(await asyncio.wait_for(queue.get(), timeout))
+				except asyncio.TimeoutError:
+					break
+			# Dispatch without blocking collection of the next batch
+			task = loop.create_task(self._dispatch(batch))
+			self._inflight.add(task)
+			task.add_done_callback(self._inflight.discard)
+
+	async def _dispatch(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+		try:
+			results = await asyncio.to_thread(self._fn, [item for item, _ in batch])
+			if len(results) != len(batch):
+				raise RuntimeError(f"batch function returned {len(results)} results for {len(batch)} items")
+		except Exception as e:
+			for _, fut in batch:
+				if not fut.done():
+					fut.set_exception(e)
+			return
+		for (_, fut), res in zip(batch, results):
+			if not fut.done():
+				fut.set_result(res)
+
+
+class WriteBehindQueue:
+	"""Bounded fire-and-forget queue drained in batches by a background thread.
+
+	`offer(item)` never blocks: it returns False when the queue is full so callers can shed load.
+	A thread (rather than an asyncio task) keeps pending writes independent of any event loop;
+	`stop()` flushes whatever is still queued.
+
+	A failed batch is retried `retries` times with exponential backoff from `backoff` seconds,
+	then written item by item with `item_fn` so one bad row can't drop the rest. Items that still
+	fail are passed to `on_drop(item, error)`.
+	"""
+
+	_STOP = object()
+
+	def __init__(
+		self,
+		fn: Callable[[List[Any]], Any],
+		maxsize: int = 1024,
+		max_batch: int = 32,
+		name: str = "write-behind",
+		retries: int = 2,
+		backoff: float = 0.1,
+		item_fn: Optional[Callable[[Any], Any]] = None,
+		on_drop: Optional[Callable[[Any, Exception], Any]] = None,
+	) -> None:
+		self._fn = fn
+		self.retries = max(0, int(retries))
+		self.backoff = max(0.0, float(backoff))
+		self._item_fn = item_fn
+		self._on_drop = on_drop
+		self.max_batch = max(1, int(max_batch))
+		self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, int(maxsize)))
+		self._name = name
+		self._thread: Optional[threading.Thread] = None
+		self._lock = threading.Lock()
+
+	def start(self) -> None:
+		with self._lock:
+			if self._thread is None or not self._thread.is_alive():
+				self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+				self._thread.start()
+
+	def offer(self, item: Any) -> bool:
+		self.start()
+		try:
+			self._queue.put_nowait(item)
+			return True
+		except queue.Full:
+			return False
+
+	def stop(self, timeout: Optional[float] = None) -> None:
+		thread = self._thread
+		if thread is None or not thread.is_alive():
+			return
+		self._queue.put(self._STOP)
+		thread.join(timeout)
+
+	def _run(self) -> None:
+		while True:
+			batch = [self._queue.get()]
+			while len(batch) < self.max_batch:
+				try:
+					batch.append(self._queue.get_nowait())
+				except queue.Empty:
+					break
+			stopping = any(item is self._STOP for item in batch)
+			items = [item for item in batch if item is not self._STOP]
+			if items:
+				self._write(items)
+			if stopping:
+				return
+
+	def _write(self, items: List[Any]) -> None:
+		for attempt in range(self.retries + 1):
+			try:
+				self._fn(items)
+				return
+			except Exception as e:
+				error = e
+				if attempt < self.retries:
+					time.sleep(self.backoff * (2 ** attempt))
+		logger.warning("%s: batch of %d failed after %d attempts: %s", self._name, len(items), self.retries + 1, error)
+		for item in items:
+			try:
+				if self._item_fn is None:
+					raise error
+				self._item_fn(item)
+			except Exception as e:
+				logger.error("%s: dropping item: %s", self._name, e)
+				if self._on_drop is not None:
+					try:
+						self._on_drop(item, e)
+					except Exception as drop_error:
+						logger.error("%s: on_drop failed: %s", self._name, drop_error)
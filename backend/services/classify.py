@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Literal
+from typing import Literal, Tuple
 import os
 
 TaskKind = Literal[
@@ -13,20 +13,44 @@ TaskKind = Literal[
 ]
 
 
+# Checked in priority order: the first category with any matching keyword wins
+_KEYWORDS: Tuple[Tuple[TaskKind, Tuple[str, ...]], ...] = (
+	("BUILD_FULLSTACK", ("fullstack", "frontend and backend", "end-to-end", "full stack")),
+	("FRONTEND_ONLY", ("frontend only", "ui only", "react", "tailwind", "html", "css")),
+	("BACKEND_ONLY", ("backend only", "api only", "fastapi", "flask", "node", "express")),
+	("CODE_SNIPPET", ("code snippet", "snippet", "example class", "function only", "method only")),
+	("REQUIREMENTS", ("requirements", "spec", "acceptance criteria", "design doc")),
+	("PREDICT", ("predict", "classify", "inference", "train", "dataset")),
+)
+
+
+def _build_automaton():
+	try:
+		import ahocorasick  # type: ignore
+	except Exception:
+		return None
+	automaton = ahocorasick.Automaton()
+	for priority, (kind, keywords) in enumerate(_KEYWORDS):
+		for kw in keywords:
+			# A keyword listed under several categories keeps its highest priority
+			if kw not in automaton or automaton.get(kw)[0] > priority:
+				automaton.add_word(kw, (priority, kind))
+	automaton.make_automaton()
+	return automaton
+
+
+# One linear pass over the prompt instead of a substring scan per keyword (pyahocorasick is optional)
+_AUTOMATON = _build_automaton()
+
+
 def classify_prompt(prompt: str) -> TaskKind:
 	text = (prompt or "").lower()
-	if any(k in text for k in ["fullstack", "frontend and backend", "end-to-end", "full stack"]):
-		return "BUILD_FULLSTACK"
-	if any(k in text for k in ["frontend only", "ui only", "react", "tailwind", "html", "css"]):
-		return "FRONTEND_ONLY"
-	if any(k in text for k in ["backend only", "api only", "fastapi", "flask", "node", "express"]):
-		return "BACKEND_ONLY"
-	if any(k in text for k in ["code snippet", "snippet", "example class", "function only", "method only"]):
-		return "CODE_SNIPPET"
-	if any(k in text for k in ["requirements", "spec", "acceptance criteria", "design doc"]):
-		return "REQUIREMENTS"
-	if any(k in text for k in ["predict", "classify", "inference", "train", "dataset"]):
-		return "PREDICT"
+	if _AUTOMATON is not None:
+		best = min((value for _, value in _AUTOMATON.iter(text)), default=None)
+		return best[1] if best is not None else "OTHER_TEXT"
+	for kind, keywords in _KEYWORDS:
+		if any(k in text for k in keywords):
+			return kind
 	return "OTHER_TEXT"
 
 
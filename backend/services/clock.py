@@ -0,0 +1,14 @@
+from __future__ import annotations
+from functools import lru_cache
+import time
+
+
+@lru_cache(maxsize=1)
+def _iso_second(sec: int) -> str:
+	return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(sec))
+
+
+def utc_iso() -> str:
+	"""UTC timestamp in datetime.isoformat() layout; the seconds prefix is formatted once per second."""
+	sec, ns = divmod(time.time_ns(), 1_000_000_000)
+	return f"{_iso_second(sec)}.{ns // 1000:06d}"
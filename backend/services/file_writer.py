@@ -0,0 +1,77 @@
+from __future__ import annotations
+from typing import Iterable, List, Mapping, Union
+import os
+import re
+
+
+# Word characters are Unicode-aware (as str.isalnum()), so non-Latin titles keep their words
+_SLUG_RE = re.compile(r"[^\w\s-]+")
+_SPACE_RE = re.compile(r"\s+")
+
+_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+
+def _write_fd(fd: int, data: bytes) -> None:
+	view = memoryview(data)
+	while view:
+		n = os.write(fd, view)
+		view = view[n:]
+
+
+def write_files(root: str, files: Mapping[str, Union[str, bytes]], dirs: Iterable[str] = ()) -> List[str]:
+	"""Write many files under root: one makedirs per unique leaf directory, then raw fd writes.
+
+	Where the platform supports it, files are opened relative to a single directory fd for
+	root (openat), so path resolution of the common prefix happens once. `dirs` names extra
+	(possibly empty) directories to create in the same pass. Returns written paths.
+	"""
+	root_path = os.path.abspath(root)
+	# Contents are encoded one file at a time while writing, so a large bundle is never held twice
+	payloads = {os.path.normpath(rel): content for rel, content in files.items()}
+	os.makedirs(root_path, exist_ok=True)
+	dirs = ({os.path.dirname(rel) for rel in payloads} | {os.path.normpath(d) for d in dirs}) - {"", "."}
+	# makedirs on a leaf creates its ancestors, so directories that contain others are skipped
+	ancestors = set()
+	for d in dirs:
+		parent = os.path.dirname(d)
+		while parent and parent not in ancestors:
+			ancestors.add(parent)
+			parent = os.path.dirname(parent)
+	for d in sorted(dirs - ancestors):
+		os.makedirs(os.path.join(root_path, d), exist_ok=True)
+
+	dir_fd = os.open(root_path, os.O_RDONLY) if os.open in os.supports_dir_fd else None
+	try:
+		for rel, content in payloads.items():
+			if dir_fd is not None:
+				fd = os.open(rel, _FLAGS, 0o644, dir_fd=dir_fd)
+			else:
+				fd = os.open(os.path.join(root_path, rel), _FLAGS, 0o644)
+			try:
+				_write_fd(fd, content.encode("utf-8") if isinstance(content, str) else content)
+			finally:
+				os.close(fd)
+	finally:
+		if dir_fd is not None:
+			os.close(dir_fd)
+	return [os.path.join(root_path, rel) for rel in payloads]
+
+
+def write_file(path: str, content: Union[str, bytes]) -> None:
+	"""Write a single file (parent directory must exist) with a raw fd write."""
+	fd = os.open(path, _FLAGS, 0o644)
+	try:
+		_write_fd(fd, content.encode("utf-8") if isinstance(content, str) else content)
+	finally:
+		os.close(fd)
+
+
+def slugify(title: str, limit: int = 40) -> str:
+	"""Directory-safe slug: letters, digits, '_' and '-' only, whitespace runs as '-', at most `limit` characters."""
+	text = (title or "").lower()
+	# Each character yields at most one slug character, so a long prompt usually only needs a
+	# short prefix scanned; the whole text is used when that prefix comes up short
+	slug = _SPACE_RE.sub("-", _SLUG_RE.sub("", text[: limit * 4]).strip())
+	if len(slug) <= limit and len(text) > limit * 4:
+		slug = _SPACE_RE.sub("-", _SLUG_RE.sub("", text).strip())
+	return slug[:limit]
@@ -0,0 +1,54 @@
+from __future__ import annotations
+from typing import Optional, Tuple
+import io
+import logging
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+_JPEG_MAGIC = b"\xff\xd8\xff"
+
+try:  # Optional libjpeg-turbo binding (SIMD IDCT + YCbCr->RGB)
+	from turbojpeg import TurboJPEG, TJPF_RGB  # type: ignore
+	_TJ: Optional["TurboJPEG"] = TurboJPEG()
+except Exception:  # module or shared library missing
+	_TJ = None
+	TJPF_RGB = None
+
+
+def is_jpeg(data: bytes, mime: Optional[str] = None) -> bool:
+	if mime:
+		return mime.lower() in ("image/jpeg", "image/jpg", "image/pjpeg")
+	return data[:3] == _JPEG_MAGIC
+
+
+def _tj_scaling(data: bytes, target: Tuple[int, int]) -> Tuple[int, int]:
+	"""Smallest libjpeg-turbo IDCT scaling factor that still covers `target`."""
+	width, height = _TJ.decode_header(data)[:2]
+	best = (1, 1)
+	for num, den in _TJ.scaling_factors:
+		if num * best[1] < best[0] * den and width * num // den >= target[0] and height * num // den >= target[1]:
+			best = (num, den)
+	return best
+
+
+def decode_image(data: bytes, mime: Optional[str] = None, target_size: Optional[Tuple[int, int]] = None) -> Image.Image:
+	"""Decode image bytes to an RGB PIL image, using libjpeg-turbo for JPEGs when available.
+
+	With `target_size`, JPEGs are downscaled inside the IDCT (never below the target) and the
+	result is resized to exactly `target_size`, so full-resolution pixels are never materialized.
+	"""
+	if _TJ is not None and is_jpeg(data, mime):
+		try:
+			scaling = _tj_scaling(data, target_size) if target_size else None
+			img = Image.fromarray(_TJ.decode(data, pixel_format=TJPF_RGB, scaling_factor=scaling))
+			return img.resize(target_size, Image.BILINEAR) if target_size else img
+		except Exception as e:
+			logger.debug("turbojpeg decode failed, falling back to PIL: %s", e)
+	img = Image.open(io.BytesIO(data))
+	if target_size:
+		# No-op for non-JPEG formats; for JPEG picks a reduced DCT scale >= target_size
+		img.draft("RGB", target_size)
+		return img.convert("RGB").resize(target_size, Image.BILINEAR)
+	return img.convert("RGB")
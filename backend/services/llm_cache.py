@@ -0,0 +1,104 @@
+from __future__ import annotations
+from typing import Any, Dict, Optional, Union
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import orjson
+
+
+MODES = ("enabled", "read-only", "write-only", "replay", "disabled")
+
+
+class CacheMiss(LookupError):
+	"""Raised in replay mode when a response is not cached (no network call is allowed)."""
+
+
+class LLMCache:
+	"""Deterministic SHA256-keyed response cache for provider calls, persisted in SQLite (WAL).
+
+	Policy comes from LLM_CACHE_MODE: enabled (read + write), read-only, write-only,
+	replay (read; a miss raises CacheMiss instead of calling out) or disabled.
+	Entries older than LLM_CACHE_TTL seconds are treated as misses (0, the default, never expires).
+	"""
+
+	def __init__(self, path: Optional[str] = None, mode: Optional[str] = None, ttl: Optional[float] = None) -> None:
+		self.mode = (mode or os.getenv("LLM_CACHE_MODE", "enabled")).strip().lower()
+		if self.mode not in MODES:
+			raise ValueError(f"LLM_CACHE_MODE must be one of {', '.join(MODES)}, got {self.mode!r}")
+		self.path = path or os.getenv("LLM_CACHE_PATH", "llm_cache.db")
+		self.ttl = float(os.getenv("LLM_CACHE_TTL", "0") if ttl is None else ttl)
+		self._conn: Optional[sqlite3.Connection] = None
+		self._lock = threading.Lock()
+
+	@property
+	def reads(self) -> bool:
+		return self.mode in ("enabled", "read-only", "replay")
+
+	@property
+	def writes(self) -> bool:
+		return self.mode in ("enabled", "write-only")
+
+	@property
+	def replay(self) -> bool:
+		return self.mode == "replay"
+
+	@staticmethod
+	def key(*parts: Union[str, bytes]) -> str:
+		h = hashlib.sha256()
+		for part in parts:
+			h.update(part if isinstance(part, bytes) else part.encode("utf-8"))
+			h.update(b"\x1f")
+		return h.hexdigest()
+
+	def _connect(self) -> sqlite3.Connection:
+		# Opened lazily so routers created in spawned build workers get their own connection
+		if self._conn is None:
+			conn = sqlite3.connect(self.path, check_same_thread=False)
+			conn.execute("PRAGMA journal_mode=WAL")
+			conn.execute("PRAGMA synchronous=NORMAL")
+			conn.execute(
+				"CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, created_at REAL NOT NULL)"
+			)
+			conn.commit()
+			self._conn = conn
+		return self._conn
+
+	def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+		if not self.reads:
+			return None
+		oldest = time.time() - self.ttl if self.ttl > 0 else 0.0
+		try:
+			with self._lock:
+				row = self._connect().execute(
+					"SELECT value FROM llm_cache WHERE key = ? AND created_at >= ?", (key, oldest)
+				).fetchone()
+		except sqlite3.Error:
+			row = None
+		if row is None:
+			if self.replay:
+				raise CacheMiss(key)
+			return None
+		return orjson.loads(row[0])
+
+	def store(self, key: str, value: Dict[str, Any]) -> None:
+		if not self.writes:
+			return
+		try:
+			with self._lock:
+				conn = self._connect()
+				conn.execute(
+					"INSERT OR REPLACE INTO llm_cache(key, value, created_at) VALUES (?, ?, ?)",
+					(key, orjson.dumps(value), time.time()),
+				)
+				conn.commit()
+		except sqlite3.Error:
+			pass
+
+	def close(self) -> None:
+		with self._lock:
+			if self._conn is not None:
+				self._conn.close()
+				self._conn = None
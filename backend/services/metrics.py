@@ -1,17 +1,34 @@
 from __future__ import annotations
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 import os
-import json
-from datetime import datetime
+import threading
+import time
 import sqlite3
 
+import orjson
+
+from .clock import utc_iso
+
+_INSERT_SQL = (
+    "INSERT INTO audit (timestamp, task_name, stage, models_used, tokens_spent, files_generated, errors, human_interventions, success_rate, metadata) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def _dumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode()
+
 
 class MetricsLogger:
     """Writes structured JSON logs and persists audit metrics to SQLite.
 
     - logs/build.log: append one JSON object per stage
     - logs/errors.log: append error entries
-    - logs/audit.sqlite: sqlite db with audit table
+    - logs/audit.sqlite: sqlite db with audit table (WAL)
+
+    Rows and log lines are buffered and written together every METRICS_FLUSH_ROWS stages or
+    METRICS_FLUSH_SECONDS, whichever comes first; call flush() at the end of a run and close()
+    when the logger is no longer needed.
     """
 
     def __init__(self, logs_dir: str = "logs") -> None:
@@ -20,10 +37,19 @@ class MetricsLogger:
         self.build_log_path = os.path.join(self.logs_dir, "build.log")
         self.error_log_path = os.path.join(self.logs_dir, "errors.log")
         self.audit_db_path = os.path.join(self.logs_dir, "audit.sqlite")
+        self.flush_rows = max(1, int(os.getenv("METRICS_FLUSH_ROWS", "32")))
+        self.flush_seconds = float(os.getenv("METRICS_FLUSH_SECONDS", "2.0"))
+        self._pending_rows: List[Tuple[Any, ...]] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._build_fh = open(self.build_log_path, "a", encoding="utf-8", buffering=1 << 16)
+        self._error_fh = None
         self._init_sqlite()
 
     def _init_sqlite(self) -> None:
         self._conn = sqlite3.connect(self.audit_db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
         cur = self._conn.cursor()
         cur.execute(
             """
@@ -56,9 +82,10 @@ class MetricsLogger:
         human_interventions: int = 0,
         success_rate: Optional[float] = None,
         metadata: Optional[Dict[str, Any]] = None,
-    ) -> None:
+    ) -> str:
+        """Buffer one stage record for the audit table and build logs; returns its JSON log line."""
         entry: Dict[str, Any] = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": utc_iso(),
             "task_name": task_name,
             "stage": stage,
             "success": success,
@@ -71,31 +98,51 @@ class MetricsLogger:
             "metadata": metadata or {},
         }
 
-        with open(self.build_log_path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(entry) + "\n")
-        if not success or errors:
-            with open(self.error_log_path, "a", encoding="utf-8") as f:
-                f.write(json.dumps(entry) + "\n")
-
-        cur = self._conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO audit (timestamp, task_name, stage, models_used, tokens_spent, files_generated, errors, human_interventions, success_rate, metadata)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                entry["timestamp"],
-                task_name,
-                stage,
-                json.dumps(models_used or {}),
-                tokens_spent or 0,
-                files_generated or 0,
-                errors or "",
-                human_interventions,
-                success_rate if success_rate is not None else (1.0 if success else 0.0),
-                json.dumps(metadata or {}),
-            ),
+        line = _dumps(entry) + "\n"
+        row = (
+            entry["timestamp"],
+            task_name,
+            stage,
+            _dumps(models_used or {}),
+            tokens_spent or 0,
+            files_generated or 0,
+            errors or "",
+            human_interventions,
+            success_rate if success_rate is not None else (1.0 if success else 0.0),
+            _dumps(metadata or {}),
         )
-        self._conn.commit()
+        with self._lock:
+            self._build_fh.write(line)
+            if not success or errors:
+                if self._error_fh is None:
+                    self._error_fh = open(self.error_log_path, "a", encoding="utf-8", buffering=1 << 16)
+                self._error_fh.write(line)
+            self._pending_rows.append(row)
+            if len(self._pending_rows) >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_seconds:
+                self._flush_locked()
+        return line
+
+    def flush(self) -> None:
+        """Write buffered audit rows in one transaction and flush the log files."""
+        with self._lock:
+            self._flush_locked()
 
+    def _flush_locked(self) -> None:
+        if self._pending_rows:
+            with self._conn:
+                self._conn.executemany(_INSERT_SQL, self._pending_rows)
+            self._pending_rows = []
+        self._build_fh.flush()
+        if self._error_fh is not None:
+            self._error_fh.flush()
+        self._last_flush = time.monotonic()
 
+    def close(self) -> None:
+        """Flush, then release the log file handles and the SQLite connection."""
+        with self._lock:
+            self._flush_locked()
+            self._build_fh.close()
+            if self._error_fh is not None:
+                self._error_fh.close()
+                self._error_fh = None
+            self._conn.close()
@@ -1,34 +1,279 @@
 from __future__ import annotations
-from typing import List
+from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+from functools import lru_cache
+import hashlib
+import logging
 import os
 import sqlite3
-from datetime import datetime
+import threading
+import time
+
+import orjson
+
+from .clock import utc_iso
+from .semantic_cache import SemanticCache
 from .storage import DatabaseService
 
 
+logger = logging.getLogger(__name__)
+
+# Quantized ONNX weights written by sentence-transformers' export_dynamic_quantized_onnx_model
+_ONNX_QINT8_FILE = "onnx/model_qint8_avx512_vnni.onnx"
+
+
+def _load_onnx_qint8(name: str):
+	"""INT8 ONNX export of `name`, built once and reused from EMBEDDINGS_CACHE_DIR (needs ST >= 3.2)."""
+	from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model  # type: ignore
+	cache_dir = os.path.join(os.getenv("EMBEDDINGS_CACHE_DIR", ".embeddings_cache"), name.replace("/", "__"))
+	if not os.path.exists(os.path.join(cache_dir, _ONNX_QINT8_FILE)):
+		model = SentenceTransformer(name, backend="onnx")
+		model.save(cache_dir)
+		export_dynamic_quantized_onnx_model(model, "avx512_vnni", cache_dir)
+	return SentenceTransformer(cache_dir, backend="onnx", model_kwargs={"file_name": _ONNX_QINT8_FILE})
+
+
+@lru_cache(maxsize=4)
+def _load_embedder(name: str, quant: str = "", dtype: str = ""):
+	"""One resident SentenceTransformer per model name (and precision), shared by every RagService.
+
+	quant: "onnx" for an INT8 ONNX Runtime model, "dynamic" for torch dynamic INT8 Linear layers,
+	anything else for the stock FP32 model. A failed quantized load falls back to FP32.
+	dtype: "fp16" or "bf16" casts the FP32 model's weights when it runs on CUDA (ignored on CPU).
+	"""
+	from sentence_transformers import SentenceTransformer  # type: ignore
+	if quant == "onnx":
+		try:
+			return _load_onnx_qint8(name)
+		except Exception as e:
+			logger.warning("INT8 ONNX embedder unavailable for %s, using FP32: %s", name, e)
+	model = SentenceTransformer(name)
+	if quant == "dynamic":
+		try:
+			import torch  # type: ignore
+			model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+		except Exception as e:
+			logger.warning("dynamic INT8 quantization failed for %s, using FP32: %s", name, e)
+	elif dtype in ("fp16", "bf16") and str(model.device).startswith("cuda"):
+		import torch  # type: ignore
+		# Tensor-core GEMMs at half the weight bandwidth; outputs are cast back to float32 for FAISS
+		model = model.half() if dtype == "fp16" else model.to(torch.bfloat16)
+	return model
+
+
 class RagService:
 	"""Optional, graceful RAG. Falls back to list-only if embeddings unavailable."""
 
-	def __init__(self, db: DatabaseService) -> None:
+	def __init__(self, db: DatabaseService, index_path: Optional[str] = None) -> None:
 		self.db = db
+		# FAISS index saved by save() and reloaded here, so restarts skip re-encoding the corpus
+		self._index_path = index_path if index_path is not None else os.getenv("RAG_INDEX_PATH", "rag.faiss")
 		self._texts: List[str] = []
+		# Object-array mirror of _texts for vectorized hit lookup; synced lazily by _texts_array()
+		self._texts_arr: Optional[Any] = None
+		self._texts_arr_n = 0
+		# Texts awaiting embedding; encoded together on flush() (or before any search)
+		self._pending: List[str] = []
+		self._pending_max = int(os.getenv("RAG_EMBED_BATCH", "64"))
+		# Upper bound on how long a text can sit unembedded while indexing keeps trickling in
+		self._pending_max_age = float(os.getenv("RAG_EMBED_FLUSH_SECONDS", "5"))
+		self._pending_since = 0.0
+		self._index_lock = threading.Lock()
+		# Bounded LRU of content hashes already indexed, so repeated texts skip embedding and writes
+		self._seen: "OrderedDict[int, None]" = OrderedDict()
+		self._seen_max = int(os.getenv("RAG_DEDUPE_MAX", "100000"))
+		# LRU of query/prompt embeddings keyed by normalized text, so repeats skip the forward pass
+		self._embed_cache: "OrderedDict[str, Any]" = OrderedDict()
+		self._embed_cache_max = int(os.getenv("RAG_EMBED_CACHE_MAX", "10000"))
+		self._embed_cache_lock = threading.Lock()
+		# Provider responses keyed by prompt embedding, one cache per stage, so reworded prompts reuse
+		# earlier generations without one stage's output being served for another
+		self._prompt_caches: Dict[str, SemanticCache] = {}
+		self._prompt_cache_threshold = float(os.getenv("PROMPT_CACHE_THRESHOLD", "0.95"))
+		self._prompt_cache_ttl = float(os.getenv("PROMPT_CACHE_TTL", "3600"))
+		# numpy, FAISS and the embedding model load on first use (see _ensure_embeddings)
 		self._has_embeddings = False
-		self._init_embeddings()
+		self._embeddings_init_attempted = False
+		self._init_lock = threading.Lock()
 		self._init_sqlite()
 
+	def _ensure_embeddings(self) -> bool:
+		"""Load embeddings (and any saved index) on first call; a failed attempt is not retried."""
+		if not self._embeddings_init_attempted:
+			with self._init_lock:
+				if not self._embeddings_init_attempted:
+					self._init_embeddings()
+					self._embeddings_init_attempted = True
+		return self._has_embeddings
+
 	def _init_embeddings(self) -> None:
 		try:
-			from sentence_transformers import SentenceTransformer  # type: ignore
 			import numpy as np  # type: ignore
 			import faiss  # type: ignore
 			self._np = np
 			self._faiss = faiss
 			model_name = os.getenv("EMBEDDINGS_MODEL", "all-MiniLM-L6-v2")
-			self.embedder = SentenceTransformer(model_name)
-			self.index = faiss.IndexFlatIP(384)
+			self.embedder = _load_embedder(
+				model_name,
+				os.getenv("EMBEDDINGS_QUANT", "").strip().lower(),
+				os.getenv("EMBEDDINGS_DTYPE", "").strip().lower(),
+			)
+			# flat (fp32), sq8 (int8 scalar quantized, default) or binary (1 bit/dim + fp32 re-rank)
+			self._index_kind = os.getenv("RAG_INDEX", "sq8").strip().lower()
+			# fp32 copies of stored vectors (binary re-ranking, exact BLAS search on small corpora):
+			# the first _xb_n rows of a preallocated buffer that doubles when full
+			self._xb: Optional[Any] = None
+			self._xb_n = 0
+			self._blas_threshold = int(os.getenv("RAG_BLAS_THRESHOLD", "20000"))
+			self.index = self._build_index(self.embedder.get_sentence_embedding_dimension())
 			self._has_embeddings = True
 		except Exception:
 			self._has_embeddings = False
+			return
+		self._load_index()
+
+	def _load_index(self) -> None:
+		"""Warm-start from a saved index and its parallel texts file; ignored unless both line up."""
+		path = self._index_path
+		if not path:
+			return
+		# One directory listing instead of a stat per sidecar file
+		base = os.path.basename(path)
+		try:
+			with os.scandir(os.path.dirname(path) or ".") as it:
+				present = {e.name for e in it if e.name.startswith(base)}
+		except OSError:
+			return
+		if base not in present or base + ".texts.jsonl" not in present:
+			return
+		binary = self._index_kind == "binary"
+		try:
+			# Read fully rather than IO_FLAG_MMAP: a mapped index can't take further add() calls
+			index = self._faiss.read_index_binary(path) if binary else self._faiss.read_index(path)
+			with open(path + ".texts.jsonl", "rb") as f:
+				texts = [orjson.loads(line) for line in f if line.strip()]
+			full = self._np.load(path + ".fp32.npy") if base + ".fp32.npy" in present else None
+		except Exception:
+			return
+		if type(index) is not type(self.index) or index.d != self.index.d or index.ntotal != len(texts):
+			return
+		self.index = index
+		self._texts = texts
+		self._texts_arr_n = 0
+		# Without matching fp32 copies, search goes through FAISS (binary results are not re-ranked)
+		if full is not None and len(full) == len(texts):
+			self._xb, self._xb_n = self._np.ascontiguousarray(full, dtype=self._np.float32), len(full)
+		for text in texts:
+			self._mark_seen(text)
+
+	def save(self) -> None:
+		"""Flush pending embeddings and persist the index with its texts (atomically replaced)."""
+		if not (self._has_embeddings and self._index_path):
+			return
+		path = self._index_path
+		with self._index_lock:
+			self._flush_locked()
+			if self._index_kind == "binary":
+				self._faiss.write_index_binary(self.index, path + ".tmp")
+			else:
+				self._faiss.write_index(self.index, path + ".tmp")
+			full = self._full_matrix()
+			if full is not None:
+				with open(path + ".fp32.npy.tmp", "wb") as f:
+					self._np.save(f, full)
+				os.replace(path + ".fp32.npy.tmp", path + ".fp32.npy")
+			elif os.path.exists(path + ".fp32.npy"):
+				os.remove(path + ".fp32.npy")
+			with open(path + ".texts.jsonl.tmp", "wb") as f:
+				f.write(b"".join(orjson.dumps(t) + b"\n" for t in self._texts))
+			os.replace(path + ".texts.jsonl.tmp", path + ".texts.jsonl")
+			os.replace(path + ".tmp", path)
+
+	def _build_index(self, dim: int):
+		"""FAISS index for RAG_INDEX; the default int8 scalar-quantized inner-product index moves 1/4
+		the memory of fp32 per query, the binary index (sign bits, Hamming distance) 1/32.
+
+		Vectors are L2-normalized before insertion and search, so every component lies in [-1, 1];
+		training on those bounds fixes the quantizer range up front instead of on a first batch.
+		"""
+		faiss, np = self._faiss, self._np
+		if self._index_kind == "flat":
+			return faiss.IndexFlatIP(dim)
+		if self._index_kind == "binary":
+			return faiss.IndexBinaryFlat(dim)
+		index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+		index.train(np.stack([np.full(dim, -1.0, dtype=np.float32), np.full(dim, 1.0, dtype=np.float32)]))
+		return index
+
+	def _add_vectors(self, vecs: Any) -> None:
+		binary = self._index_kind == "binary"
+		self.index.add(self._np.packbits(vecs > 0, axis=1) if binary else vecs)
+		if binary or self.index.ntotal <= self._blas_threshold:
+			self._append_full(vecs)
+		else:
+			# Past the threshold FAISS serves every search; don't keep an unused fp32 copy around
+			self._xb, self._xb_n = None, 0
+
+	def _append_full(self, vecs: Any) -> None:
+		"""Copy vecs into the fp32 buffer, doubling its capacity (at least 1024 rows) when full."""
+		n = self._xb_n + len(vecs)
+		if self._xb is None or n > len(self._xb):
+			cap = max(n, 1024, 2 * (len(self._xb) if self._xb is not None else 0))
+			grown = self._np.empty((cap, vecs.shape[1]), dtype=self._np.float32)
+			if self._xb_n:
+				grown[: self._xb_n] = self._xb[: self._xb_n]
+			self._xb = grown
+		self._xb[self._xb_n : n] = vecs
+		self._xb_n = n
+
+	def _full_matrix(self) -> Optional[Any]:
+		"""fp32 copies of every indexed vector (a view of the buffer), or None if incomplete."""
+		if self._xb is None or self._xb_n != self.index.ntotal:
+			return None
+		return self._xb[: self._xb_n]
+
+	def _search(self, queries: Any, k: int) -> Any:
+		"""Row indices of the top-k stored vectors per query (-1 padded), by cosine similarity."""
+		np = self._np
+		with self._index_lock:
+			full = self._full_matrix()
+		if self._index_kind != "binary":
+			if full is None or not len(full):
+				return self.index.search(queries, k)[1]
+			# Small corpus: one SGEMM over all queries plus argpartition beats FAISS's per-query dispatch
+			scores = queries @ full.T
+			kk = min(k, len(full))
+			top = np.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+			order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+			return np.take_along_axis(top, order, axis=1)
+		# Hamming search over sign bits for 4k candidates, then exact cosine re-rank on fp32 copies
+		_, cand = self.index.search(np.packbits(queries > 0, axis=1), 4 * k)
+		if full is None:
+			return cand[:, :k]
+		out = np.full((len(queries), k), -1, dtype=np.int64)
+		for row, (q, ids) in enumerate(zip(queries, cand)):
+			ids = ids[ids >= 0]
+			best = ids[np.argsort(-(full[ids] @ q))[:k]]
+			out[row, : len(best)] = best
+		return out
+
+	def _texts_array(self) -> Any:
+		"""_texts as a NumPy object array, copying only texts added since the last call (doubling growth)."""
+		n = len(self._texts)
+		if n > self._texts_arr_n:
+			if self._texts_arr is None or n > len(self._texts_arr):
+				grown = self._np.empty(max(n, 1024, 2 * (len(self._texts_arr) if self._texts_arr is not None else 0)), dtype=object)
+				if self._texts_arr_n:
+					grown[: self._texts_arr_n] = self._texts_arr[: self._texts_arr_n]
+				self._texts_arr = grown
+			self._texts_arr[self._texts_arr_n : n] = self._texts[self._texts_arr_n : n]
+			self._texts_arr_n = n
+		return self._texts_arr[:n]
+
+	def _normalized(self, vecs: Any) -> Any:
+		vecs = self._np.ascontiguousarray(vecs, dtype=self._np.float32)
+		self._faiss.normalize_L2(vecs)
+		return vecs
 
 	def _init_sqlite(self) -> None:
 		"""Initialize optional SQLite persistence using RAG_DB_URL or rag.db."""
@@ -36,39 +281,168 @@ class RagService:
 		# crude parse for sqlite path
 		path = url.replace("sqlite:///", "").strip()
 		self._rag_db_path = path if path else "rag.db"
+		# One connection per thread instead of a single shared one behind check_same_thread=False
+		self._rag_local = threading.local()
+		self._rag_enabled = True
 		try:
-			self._rag_conn = sqlite3.connect(self._rag_db_path, check_same_thread=False)
-			cur = self._rag_conn.cursor()
-			cur.execute(
+			conn = self._rag_conn()
+			conn.execute(
 				"CREATE TABLE IF NOT EXISTS rag_entries (id INTEGER PRIMARY KEY, text TEXT NOT NULL, created_at TEXT NOT NULL)"
 			)
-			self._rag_conn.commit()
+			conn.commit()
 		except Exception:
-			self._rag_conn = None
+			self._rag_enabled = False
+
+	def _rag_conn(self) -> Optional[sqlite3.Connection]:
+		"""This thread's SQLite connection (opened on first use), or None if persistence is off."""
+		if not self._rag_enabled:
+			return None
+		conn = getattr(self._rag_local, "conn", None)
+		if conn is None:
+			conn = sqlite3.connect(self._rag_db_path, timeout=5.0)
+			# WAL: readers on other connections don't block the appender, and commits skip the
+			# rollback-journal fsyncs; the rest are per-connection settings
+			for pragma in ("journal_mode=WAL", "synchronous=NORMAL", "temp_store=MEMORY", "cache_size=-20000", "busy_timeout=5000"):
+				conn.execute(f"PRAGMA {pragma}")
+			self._rag_local.conn = conn
+		return conn
+
+	def _mark_seen(self, text: str) -> bool:
+		"""Record text's hash; return True if it was already indexed."""
+		h = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+		if h in self._seen:
+			self._seen.move_to_end(h)
+			return True
+		self._seen[h] = None
+		if len(self._seen) > self._seen_max:
+			self._seen.popitem(last=False)
+		return False
 
 	def index_text(self, text: str) -> None:
-		self._texts.append(text)
-		if self._has_embeddings:
-			vec = self.embedder.encode([text])
-			self.index.add(vec.astype(self._np.float32))
+		self.index_texts([text])
+
+	def index_texts(self, texts: List[str]) -> None:
+		"""Index texts; embedding is deferred until RAG_EMBED_BATCH texts are pending (or the oldest
+		has waited RAG_EMBED_FLUSH_SECONDS), a search needs them, or flush() is called."""
+		# Before touching _texts: loading a saved index replaces it
+		has_embeddings = self._ensure_embeddings()
+		with self._index_lock:
+			fresh = [t for t in texts if not self._mark_seen(t)]
+			if not fresh:
+				return
+			self._texts.extend(fresh)
+			if has_embeddings:
+				if not self._pending:
+					self._pending_since = time.monotonic()
+				self._pending.extend(fresh)
+				if len(self._pending) >= self._pending_max or time.monotonic() - self._pending_since >= self._pending_max_age:
+					self._flush_locked()
 		# persist to sqlite (append-only)
 		try:
-			if getattr(self, "_rag_conn", None):
-				cur = self._rag_conn.cursor()
-				cur.execute("INSERT INTO rag_entries(text, created_at) VALUES (?, ?)", (text, datetime.utcnow().isoformat()))
-				self._rag_conn.commit()
+			conn = self._rag_conn()
+			if conn is not None:
+				now = utc_iso()
+				with conn:
+					conn.executemany("INSERT INTO rag_entries(text, created_at) VALUES (?, ?)", [(t, now) for t in fresh])
+		except Exception:
+			pass
+
+	def flush(self, batch_size: int = 64) -> None:
+		"""Embed all pending texts in one batched encode and add them to the index."""
+		with self._index_lock:
+			self._flush_locked(batch_size)
+
+	def _flush_locked(self, batch_size: int = 64) -> None:
+		if not self._pending:
+			return
+		vecs = self.embedder.encode(self._pending, batch_size=batch_size, show_progress_bar=False, convert_to_numpy=True, normalize_embeddings=True)
+		self._add_vectors(self._normalized(vecs))
+		self._pending = []
+
+	def _cache_key(self, text: str) -> str:
+		# The tokenizer ignores runs of whitespace (and case, for uncased models like MiniLM)
+		key = " ".join(text.split())
+		return key.lower() if getattr(getattr(self.embedder, "tokenizer", None), "do_lower_case", False) else key
+
+	def _encode_cached(self, texts: List[str]) -> Any:
+		"""Unit-length float32 embeddings for texts; only cache misses are encoded, in one batch."""
+		keys = [self._cache_key(t) for t in texts]
+		with self._embed_cache_lock:
+			rows = [self._embed_cache.get(k) for k in keys]
+			for k, row in zip(keys, rows):
+				if row is not None:
+					self._embed_cache.move_to_end(k)
+		misses = [i for i, row in enumerate(rows) if row is None]
+		if misses:
+			vecs = self._normalized(self.embedder.encode([texts[i] for i in misses], show_progress_bar=False, convert_to_numpy=True))
+			with self._embed_cache_lock:
+				for i, vec in zip(misses, vecs):
+					rows[i] = self._embed_cache[keys[i]] = vec
+				while len(self._embed_cache) > self._embed_cache_max:
+					self._embed_cache.popitem(last=False)
+		return self._np.stack(rows)
+
+	def embed(self, text: str) -> Optional[Any]:
+		"""Return the unit-length embedding for text (dot product = cosine), or None without embeddings."""
+		if not self._ensure_embeddings():
+			return None
+		return self._encode_cached([text])[0]
+
+	def embed_batch(self, texts: List[str]) -> Optional[Any]:
+		"""Unit-length embeddings for non-empty texts as one (n, dim) array, encoded in one batch; None without embeddings."""
+		if not self._ensure_embeddings():
+			return None
+		return self._encode_cached(texts)
+
+	def _prompt_cache(self, stage: str) -> SemanticCache:
+		cache = self._prompt_caches.get(stage)
+		if cache is None:
+			cache = self._prompt_caches.setdefault(stage, SemanticCache(threshold=self._prompt_cache_threshold))
+		return cache
+
+	def semantic_cache_lookup(self, stage: str, prompt: str, threshold: Optional[float] = None) -> Optional[Dict[str, Any]]:
+		"""Return a stage's cached response for a semantically similar prompt, or None on a miss or expiry.
+
+		`prompt` should be the user's own text: instruction boilerplate shared by every request
+		would dominate the embedding and let unrelated prompts match.
+		"""
+		vec = self.embed(prompt)
+		if vec is None:
+			return None
+		hit = self._prompt_cache(stage).get(vec, threshold)
+		if hit is None:
+			return None
+		stored_at, response = hit
+		if self._prompt_cache_ttl > 0 and time.time() - stored_at > self._prompt_cache_ttl:
+			return None
+		return {**response, "cached": True}
+
+	def semantic_cache_put(self, stage: str, prompt: str, response: Dict[str, Any]) -> None:
+		"""Cache a stage's provider response under the prompt's embedding; no-op without embeddings."""
+		vec = self.embed(prompt)
+		if vec is not None:
+			self._prompt_cache(stage).put(vec, (time.time(), response))
+
+	def recent(self, limit: int = 200) -> List[str]:
+		"""Return the most recently persisted entries (newest first)."""
+		try:
+			conn = self._rag_conn()
+			if conn is not None:
+				cur = conn.cursor()
+				cur.execute("SELECT text FROM rag_entries ORDER BY id DESC LIMIT ?", (limit,))
+				return [r[0] for r in cur.fetchall()]
 		except Exception:
 			pass
+		return list(reversed(self._texts[-limit:]))
 
 	def retrieve(self, query: str, k: int = 3) -> List[str]:
-		if self._has_embeddings and self._texts:
-			vec = self.embedder.encode([query]).astype(self._np.float32)
-			_, idx = self.index.search(vec, k)
-			return [self._texts[i] for i in idx[0] if 0 <= i < len(self._texts)]
+		if self._ensure_embeddings() and self._texts:
+			return self.retrieve_batch([query], k)[0]
 		# Fallback: return last k items from sqlite if available, else memory
 		try:
-			if getattr(self, "_rag_conn", None):
-				cur = self._rag_conn.cursor()
+			conn = self._rag_conn()
+			if conn is not None:
+				cur = conn.cursor()
 				cur.execute("SELECT text FROM rag_entries ORDER BY id DESC LIMIT ?", (k,))
 				rows = cur.fetchall()
 				if rows:
@@ -77,4 +451,14 @@ class RagService:
 			pass
 		return list(self._texts[-k:])
 
-
+	def retrieve_batch(self, queries: List[str], k: int = 3) -> List[List[str]]:
+		"""Top-k texts for each query, encoding all queries together and searching once."""
+		if not (self._ensure_embeddings() and self._texts):
+			return [self.retrieve(q, k) for q in queries]
+		self.flush()
+		idx = self._search(self._encode_cached(queries), k)
+		with self._index_lock:
+			texts = self._texts_array()
+		n = len(texts)
+		# Fancy indexing on the object array keeps the per-hit loop in C
+		return [texts[row[(row >= 0) & (row < n)]].tolist() for row in idx]
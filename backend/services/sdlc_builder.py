@@ -1,10 +1,18 @@
 from __future__ import annotations
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import html
 import os
-import json
-from datetime import datetime
+import shlex
+import shutil
+import subprocess
+import time
+
+import orjson
 
 from .adapters import InferenceRouter
+from .clock import utc_iso
+from .file_writer import slugify, write_file, write_files
 from .metrics import MetricsLogger
 
 
@@ -15,81 +23,75 @@ class SDLCBuilder:
         self.runs_dir = runs_dir
         self.fast_mode = fast_mode
         os.makedirs(self.runs_dir, exist_ok=True)
+        # Long-lived I/O workers (threads start lazily), reused across builds instead of spawned per build
+        self._pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="sdlc")
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+        self.metrics.close()
+        self.router.close()
 
     def _mk_run_dir(self, title: str) -> str:
-        ts = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
-        slug = "".join(c for c in (title or "").lower() if c.isalnum() or c in ("-", "_", " ")).strip().replace(" ", "-")
-        path = os.path.join(self.runs_dir, f"{ts}-{slug[:40]}")
+        ts = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+        path = os.path.join(self.runs_dir, f"{ts}-{slugify(title)}")
         os.makedirs(path, exist_ok=True)
         return path
 
-    def _write_text(self, path: str, content: str) -> None:
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(content)
-
-    def _json(self, obj: Any) -> str:
-        return json.dumps(obj, indent=2, ensure_ascii=False)
+    def _json(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
 
     def build(self, prompt: str) -> Dict[str, Any]:
         self.router.refresh()
+        # One snapshot per build: every phase sees the same providers even if a refresh lands mid-run
+        available = frozenset(name for name, ok in self.router.providers.items() if ok)
         run_dir = self._mk_run_dir(prompt or "project")
         task_name = os.path.basename(run_dir)
         artifacts: Dict[str, Any] = {"backend": {}, "frontend": {}, "tests": {}, "infra": {}, "docs": {}, "requirements": {}}
-        logs: List[Dict[str, Any]] = []
-
-        def record(stage: str, success: bool, models_used: Dict[str, Any], files_generated: int, errors: Optional[str], metadata: Optional[Dict[str, Any]] = None) -> None:
-            logs.append({
-                "timestamp": datetime.utcnow().isoformat(),
-                "stage": stage,
-                "success": success,
-                "models_used": models_used,
-                "files_generated": files_generated,
-                "errors": errors,
-                "metadata": metadata or {},
-            })
-            self.metrics.log_stage(task_name=task_name, stage=stage, success=success, models_used=models_used, files_generated=files_generated, errors=errors, metadata=metadata)
-
-        # Phase 1 – Requirements (FAST: templates only; otherwise Gemini → OpenAI)
-        req_models = {}
-        req_md = ""
-        req_json: Dict[str, Any] = {}
-        try:
-            if self.fast_mode:
-                req_md = f"# Requirements\n\nProject: {prompt[:64] or 'Project'}\n\n- Frontend: React + Vite + TailwindCSS\n- Backend: FastAPI + SQLite\n- Features: CRUD, Search, Health check, Providers\n- Deployment: Docker + GitHub Actions\n"
-                req_models = {"mode": "fast"}
-            else:
-                res_g = self.router.generate_text(f"Extract detailed, structured requirements (title, description, modules, frontend stack, backend stack, DB schema, API routes, features, deployment) for: {prompt}", preference=["gemini"]) if self.router.providers.get("gemini") else {"output": "", "provider": None, "model": None}
-                res_o = self.router.generate_text(f"Refine the following requirements to be concise and actionable and return improved text only:\n\n{res_g.get('output','')}", preference=["openai"]) if self.router.providers.get("openai") else {"output": res_g.get("output",""), "provider": None, "model": None}
-                req_models = {"gemini": res_g.get("model"), "openai": res_o.get("model")}
-                req_md = res_o.get("output") or res_g.get("output") or ""
-            req_json = {
-                "title": prompt[:64] or "Project",
-                "description": prompt,
-                "modules": ["Auth", "Core"],
-                "frontend": ["React", "TailwindCSS"],
-                "backend": ["FastAPI", "SQLite"],
-                "features": ["CRUD", "Search", "User roles"],
-                "deployment": "Docker + GitHub Actions",
-            }
-            self._write_text(os.path.join(run_dir, "requirements", "requirements.md"), req_md)
-            self._write_text(os.path.join(run_dir, "requirements", "requirements.json"), self._json(req_json))
-            artifacts["requirements"] = {"paths": [os.path.join(run_dir, "requirements", "requirements.md"), os.path.join(run_dir, "requirements", "requirements.json")]}
-            record("requirements", True, req_models, 2, None)
-        except Exception as e:
-            record("requirements", False, req_models, 0, str(e))
-
-        # Phase 2 – Backend Generation (Dynamic AI-generated backend)
-        be_models = {}
-        try:
-            backend_root = os.path.join(run_dir, "backend")
-            for d in ["routes", "models", "services", "tests"]:
-                os.makedirs(os.path.join(backend_root, d), exist_ok=True)
+        # Stage records are streamed to logs.jsonl as they happen; the report only references the file
+        with open(os.path.join(run_dir, "logs.jsonl"), "a", encoding="utf-8") as log_fh:
+
+            def record(stage: str, success: bool, models_used: Dict[str, Any], files_generated: int, errors: Optional[str], metadata: Optional[Dict[str, Any]] = None) -> None:
+                # One entry dict and one serialization per stage: the metrics log line is reused here
+                log_fh.write(self.metrics.log_stage(task_name=task_name, stage=stage, success=success, models_used=models_used, files_generated=files_generated, errors=errors, metadata=metadata))
+
+            # Phase 1 – Requirements (FAST: templates only; otherwise Gemini → OpenAI)
+            def phase_requirements() -> Tuple[Any, ...]:
+                req_models = {}
+                req_md = ""
+                req_json: Dict[str, Any] = {}
+                try:
+                    if self.fast_mode:
+                        req_md = f"# Requirements\n\nProject: {prompt[:64] or 'Project'}\n\n- Frontend: React + Vite + TailwindCSS\n- Backend: FastAPI + SQLite\n- Features: CRUD, Search, Health check, Providers\n- Deployment: Docker + GitHub Actions\n"
+                        req_models = {"mode": "fast"}
+                    else:
+                        res_g = self.router.generate_text(f"Extract detailed, structured requirements (title, description, modules, frontend stack, backend stack, DB schema, API routes, features, deployment) for: {prompt}", preference=["gemini"], max_inflight=1) if "gemini" in available else {"output": "", "provider": None, "model": None}
+                        res_o = self.router.generate_text(f"Refine the following requirements to be concise and actionable and return improved text only:\n\n{res_g.get('output','')}", preference=["openai"], max_inflight=1) if "openai" in available else {"output": res_g.get("output",""), "provider": None, "model": None}
+                        req_models = {"gemini": res_g.get("model"), "openai": res_o.get("model")}
+                        req_md = res_o.get("output") or res_g.get("output") or ""
+                    req_json = {
+                        "title": prompt[:64] or "Project",
+                        "description": prompt,
+                        "modules": ["Auth", "Core"],
+                        "frontend": ["React", "TailwindCSS"],
+                        "backend": ["FastAPI", "SQLite"],
+                        "features": ["CRUD", "Search", "User roles"],
+                        "deployment": "Docker + GitHub Actions",
+                    }
+                    write_files(run_dir, {"requirements/requirements.md": req_md, "requirements/requirements.json": self._json(req_json)})
+                    artifacts["requirements"] = {"paths": [os.path.join(run_dir, "requirements", "requirements.md"), os.path.join(run_dir, "requirements", "requirements.json")]}
+                    return ("requirements", True, req_models, 2, None)
+                except Exception as e:
+                    return ("requirements", False, req_models, 0, str(e))
+
+            # Phase 2 – Backend Generation (Dynamic AI-generated backend)
+            def phase_backend() -> Tuple[Any, ...]:
+                be_models = {}
+                try:
+                    backend_root = os.path.join(run_dir, "backend")
+                    written = 0
             
-            written = 0
-            
-            # Generate dynamic backend based on prompt
-            backend_instruction = f"""
+                    # Generate dynamic backend based on prompt
+                    backend_instruction = f"""
 Create a complete, functional FastAPI backend for: {prompt}
 
 Requirements:
@@ -105,53 +107,45 @@ Requirements:
 The backend should be fully functional and ready to run. Return ONLY a JSON object mapping file paths to contents.
 """
             
-            gen = self.router.generate_code(backend_instruction)
-            files = gen.get("files") or {}
-            be_models = {"provider": gen.get("provider"), "model": gen.get("model"), "tokens": gen.get("tokens")}
+                    gen = self.router.generate_code(backend_instruction)
+                    files = gen.get("files") or {}
+                    be_models = {"provider": gen.get("provider"), "model": gen.get("model"), "tokens": gen.get("tokens")}
             
-            if isinstance(files, dict) and files:
-                for rel, content in files.items():
-                    path = os.path.join(backend_root, rel)
-                    self._write_text(path, content)
-                    written += 1
+                    outputs: Dict[str, str] = dict(files) if isinstance(files, dict) else {}
+                    present = {os.path.normpath(rel) for rel in outputs}
             
-            # Ensure essential files exist with dynamic content
-            if not os.path.exists(os.path.join(backend_root, "main.py")):
-                main_content = self._generate_dynamic_main(prompt)
-                self._write_text(os.path.join(backend_root, "main.py"), main_content)
-                written += 1
+                    # Ensure essential files exist with dynamic content
+                    if "main.py" not in present:
+                        outputs["main.py"] = self._generate_dynamic_main(prompt)
+                    if "requirements.txt" not in present:
+                        outputs["requirements.txt"] = _TEMPLATE_BACKEND_REQUIREMENTS
+                    if os.path.join("tests", "test_health.py") not in present:
+                        outputs["tests/test_health.py"] = _TEMPLATE_BACKEND_TESTS
+                    # Scaffold dirs and generated files' dirs created in one deduplicated pass, then all
+                    # files written
+                    written += len(write_files(backend_root, outputs, dirs=("routes", "models", "services", "tests")))
                 
-            if not os.path.exists(os.path.join(backend_root, "requirements.txt")):
-                req_content = self._generate_dynamic_requirements(prompt)
-                self._write_text(os.path.join(backend_root, "requirements.txt"), req_content)
-                written += 1
-                
-            if not os.path.exists(os.path.join(backend_root, "tests", "test_health.py")):
-                test_content = self._generate_dynamic_tests(prompt)
-                self._write_text(os.path.join(backend_root, "tests", "test_health.py"), test_content)
-                written += 1
-                
-            # Generate dynamic status.json
-            status_content = self._generate_dynamic_status(prompt, written, be_models)
-            self._write_text(os.path.join(run_dir, "status.json"), status_content)
-            written += 1
+                    # Generate dynamic status.json
+                    status_content = self._generate_dynamic_status(prompt, written, be_models)
+                    write_file(os.path.join(run_dir, "status.json"), status_content)
+                    written += 1
             
-            artifacts["backend"] = {"root": backend_root}
-            record("backend", True, be_models, written, None)
-        except Exception as e:
-            record("backend", False, be_models, 0, str(e))
-
-        # Phase 3 – Frontend Generation (Dynamic React + Tailwind + Vite)
-        fe_models = {}
-        try:
-            frontend_root = os.path.join(run_dir, "frontend")
-            files_written = 0
-            files_created: set[str] = set()
-            used_v0 = False
+                    artifacts["backend"] = {"root": backend_root}
+                    return ("backend", True, be_models, written, None)
+                except Exception as e:
+                    return ("backend", False, be_models, 0, str(e))
+
+            # Phase 3 – Frontend Generation (Dynamic React + Tailwind + Vite)
+            def phase_frontend() -> Tuple[Any, ...]:
+                fe_models = {}
+                try:
+                    frontend_root = os.path.join(run_dir, "frontend")
+                    outputs: Dict[str, str] = {}
+                    used_v0 = False
             
-            # Try v0.dev first for dynamic frontend generation
-            if (not self.fast_mode) and self.router.providers.get("v0"):
-                v0_prompt = f"""
+                    # Try v0.dev first for dynamic frontend generation
+                    if (not self.fast_mode) and "v0" in available:
+                        v0_prompt = f"""
 Create a modern, attractive React (Vite) + Tailwind frontend for: {prompt}
 
 Requirements:
@@ -166,120 +160,138 @@ Requirements:
 
 The frontend should be fully functional and ready to run with npm install && npm run dev.
 """
-                resp = self.router.run_tool("v0", v0_prompt)
-                files = resp.get("files") if isinstance(resp, dict) else None
-                fe_models = {"provider": "v0", "model": (resp.get("model") if isinstance(resp, dict) else None)}
-                if files:
-                    used_v0 = True
-                    for rel, content in files.items():
-                        path = os.path.join(frontend_root, rel)
-                        self._write_text(path, content)
-                        files_written += 1
-                        files_created.add(rel.replace("\\", "/"))
+                        resp = self.router.run_tool("v0", v0_prompt)
+                        files = resp.get("files") if isinstance(resp, dict) else None
+                        fe_models = {"provider": "v0", "model": (resp.get("model") if isinstance(resp, dict) else None)}
+                        if files:
+                            used_v0 = True
+                            for rel, content in files.items():
+                                outputs[rel.replace("\\", "/")] = content
             
-            # Ensure essential files exist with dynamic content
-            def ensure(rel_path: str, content: str) -> None:
-                nonlocal files_written
-                normalized = rel_path.replace("\\", "/")
-                if normalized not in files_created:
-                    self._write_text(os.path.join(frontend_root, rel_path), content)
-                    files_written += 1
-                    files_created.add(normalized)
-
-            # Generate dynamic frontend files
-            ensure("package.json", self._generate_dynamic_package_json(prompt))
-            ensure("tailwind.config.js", _TEMPLATE_TAILWIND_CONFIG)
-            ensure("postcss.config.js", _TEMPLATE_POSTCSS)
-            ensure("vite.config.js", _TEMPLATE_VITE)
-            ensure("index.html", self._generate_dynamic_index_html(prompt))
-            ensure(os.path.join("src", "main.jsx"), _TEMPLATE_MAIN_JSX)
-            ensure(os.path.join("src", "index.css"), _TEMPLATE_INDEX_CSS)
-            ensure(os.path.join("src", "App.jsx"), self._generate_dynamic_app_jsx(prompt))
-            ensure(os.path.join("src", "components", "ApiStatus.jsx"), self._generate_api_status_component())
-            ensure(os.path.join("src", "components", "EndpointCard.jsx"), self._generate_endpoint_card_component())
+                    # Ensure essential files exist with dynamic content
+                    def ensure(rel_path: str, content: str) -> None:
+                        outputs.setdefault(rel_path.replace("\\", "/"), content)
+
+                    # Generate dynamic frontend files
+                    ensure("package.json", self._generate_dynamic_package_json(prompt))
+                    ensure("tailwind.config.js", _TEMPLATE_TAILWIND_CONFIG)
+                    ensure("postcss.config.js", _TEMPLATE_POSTCSS)
+                    ensure("vite.config.js", _TEMPLATE_VITE)
+                    ensure("index.html", self._generate_dynamic_index_html(prompt))
+                    ensure(os.path.join("src", "main.jsx"), _TEMPLATE_MAIN_JSX)
+                    ensure(os.path.join("src", "index.css"), _TEMPLATE_INDEX_CSS)
+                    ensure(os.path.join("src", "App.jsx"), self._generate_dynamic_app_jsx(prompt))
+                    ensure(os.path.join("src", "components", "ApiStatus.jsx"), _TEMPLATE_API_STATUS_JSX)
+                    ensure(os.path.join("src", "components", "EndpointCard.jsx"), _TEMPLATE_ENDPOINT_CARD_JSX)
+                    files_written = len(write_files(frontend_root, outputs))
             
-            artifacts["frontend"] = {"root": frontend_root}
-            record("frontend", True, {**fe_models, "used_v0": used_v0}, files_written, None)
-        except Exception as e:
-            record("frontend", False, fe_models, 0, str(e))
-
-        # Phase 4 – Testing & Deployment (Dynamic Docker integration)
-        td_models = {}
-        try:
-            td_models = {"tests": ("mistral" if self.router.providers.get("mistral") else None), "infra": [n for n in ["groq", "openai"] if self.router.providers.get(n)]}
+                    artifacts["frontend"] = {"root": frontend_root}
+                    return ("frontend", True, {**fe_models, "used_v0": used_v0}, files_written, None)
+                except Exception as e:
+                    return ("frontend", False, fe_models, 0, str(e))
+
+            # Phases 1-3 only share the prompt, so their provider calls (requirements chain, backend
+            # codegen, v0 frontend) overlap; stages are still recorded in pipeline order
+            futures = [self._pool.submit(phase) for phase in (phase_requirements, phase_backend, phase_frontend)]
+            for fut in futures:
+                record(*fut.result())
+
+            # Phase 4 – Testing & Deployment (Dynamic Docker integration)
+            def phase_deployment() -> Tuple[Any, ...]:
+                td_models = {}
+                try:
+                    td_models = {"tests": ("mistral" if "mistral" in available else None), "infra": [n for n in ["groq", "openai"] if n in available]}
             
-            # Generate dynamic deployment files
-            self._write_text(os.path.join(run_dir, "pytest.ini"), _TEMPLATE_PYTEST_INI)
-            self._write_text(os.path.join(run_dir, "Dockerfile"), self._generate_dynamic_dockerfile(prompt))
-            self._write_text(os.path.join(run_dir, "docker-compose.yml"), self._generate_dynamic_docker_compose(prompt))
+                    # Generate dynamic deployment files (plus the frontend Dockerfile) in one batch
+                    write_files(run_dir, {
+                        "pytest.ini": _TEMPLATE_PYTEST_INI,
+                        "Dockerfile": _TEMPLATE_BACKEND_DOCKERFILE,
+                        "docker-compose.yml": self._generate_dynamic_docker_compose(prompt),
+                        "frontend/Dockerfile": _TEMPLATE_FRONTEND_DOCKERFILE,
+                        ".github/workflows/deploy.yml": _TEMPLATE_GH_ACTIONS,
+                    })
             
-            # Generate frontend Dockerfile
-            frontend_dockerfile = self._generate_frontend_dockerfile()
-            self._write_text(os.path.join(run_dir, "frontend", "Dockerfile"), frontend_dockerfile)
+                    artifacts["infra"] = {
+                        "dockerfile": os.path.join(run_dir, "Dockerfile"), 
+                        "frontend_dockerfile": os.path.join(run_dir, "frontend", "Dockerfile"),
+                        "compose": os.path.join(run_dir, "docker-compose.yml"), 
+                        "workflow": os.path.join(run_dir, ".github", "workflows", "deploy.yml")
+                    }
+                    return ("deployment", True, td_models, 5, None)
+                except Exception as e:
+                    return ("deployment", False, td_models, 0, str(e))
+
+            # Phase 5 – Documentation (Dynamic documentation generation)
+            def phase_docs() -> Tuple[Any, ...]:
+                doc_models = {}
+                try:
+                    # Generate dynamic README
+                    readme_md = self._generate_dynamic_readme(prompt)
+                    doc_models = {"generated": "dynamic"}
             
-            os.makedirs(os.path.join(run_dir, ".github", "workflows"), exist_ok=True)
-            self._write_text(os.path.join(run_dir, ".github", "workflows", "deploy.yml"), _TEMPLATE_GH_ACTIONS)
+                    # Create docs directory and files
+                    docs_root = os.path.join(run_dir, "docs")
+                    write_files(run_dir, {"README.md": readme_md, "mkdocs.yml": _TEMPLATE_MKDOCS, "docs/index.md": _TEMPLATE_DOCS_INDEX})
             
-            artifacts["infra"] = {
-                "dockerfile": os.path.join(run_dir, "Dockerfile"), 
-                "frontend_dockerfile": os.path.join(run_dir, "frontend", "Dockerfile"),
-                "compose": os.path.join(run_dir, "docker-compose.yml"), 
-                "workflow": os.path.join(run_dir, ".github", "workflows", "deploy.yml")
-            }
-            record("deployment", True, td_models, 5, None)
-        except Exception as e:
-            record("deployment", False, td_models, 0, str(e))
-
-        # Auto diagnostics (skip in FAST mode)
-        if not self.fast_mode:
-            try:
-                import subprocess, shlex
-                def run_cmd(cmd: str, timeout: int = 180) -> Dict[str, Any]:
+                    artifacts["docs"] = {
+                        "paths": [
+                            os.path.join(run_dir, "README.md"), 
+                            os.path.join(run_dir, "mkdocs.yml"), 
+                            os.path.join(docs_root, "index.md")
+                        ]
+                    }
+                    return ("documentation", True, doc_models, 3, None)
+                except Exception as e:
+                    return ("documentation", False, doc_models, 0, str(e))
+
+            # Deployment and docs only read the prompt: generate both at once, and let the docs
+            # overlap diagnostics too (diagnostics still start after the deployment files exist)
+            deployment_fut = self._pool.submit(phase_deployment)
+            docs_fut = self._pool.submit(phase_docs)
+            record(*deployment_fut.result())
+
+            # Auto diagnostics (skip in FAST mode, and when pytest/flake8 aren't installed rather than
+            # spawning a command that can only fail)
+            missing_tools = [] if self.fast_mode else [tool for tool in ("pytest", "flake8") if shutil.which(tool) is None]
+            if missing_tools:
+                self.metrics.log_stage(task_name=task_name, stage="diagnostics", success=True, models_used={}, files_generated=0, errors=None, metadata={"skipped": True, "missing": missing_tools})
+            elif not self.fast_mode:
+                try:
+                    def start_cmd(cmd: str) -> subprocess.Popen:
+                        return subprocess.Popen(shlex.split(cmd), stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                    def wait_cmd(proc: subprocess.Popen, deadline: float) -> Dict[str, Any]:
+                        try:
+                            out, err = proc.communicate(timeout=max(0.0, deadline - time.monotonic()))
+                            return {"code": proc.returncode, "stdout": out[-4000:], "stderr": err[-4000:]}
+                        except subprocess.TimeoutExpired:
+                            proc.kill()
+                            proc.communicate()
+                            return {"code": -1, "stdout": "", "stderr": "timeout"}
+                    junit_json = os.path.join(run_dir, "pytest-report.json")
+                    pytest_cmd = f"pytest -q --maxfail=1 --disable-warnings --json-report --json-report-file={junit_json}"
+                    flake8_cmd = "flake8"
+                    # Independent checks: run both at once so the wall clock is the slower one, not the sum
+                    started = time.monotonic()
+                    pp = start_cmd(pytest_cmd)
                     try:
-                        proc = subprocess.run(shlex.split(cmd), stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout, check=False, text=True)
-                        return {"code": proc.returncode, "stdout": proc.stdout[-4000:], "stderr": proc.stderr[-4000:]}
-                    except subprocess.TimeoutExpired:
-                        return {"code": -1, "stdout": "", "stderr": "timeout"}
-                junit_json = os.path.join(run_dir, "pytest-report.json")
-                pytest_cmd = f"pytest -q --maxfail=1 --disable-warnings --json-report --json-report-file={junit_json}"
-                flake8_cmd = "flake8"
-                pr = run_cmd(pytest_cmd, timeout=240)
-                fr = run_cmd(flake8_cmd, timeout=120)
-                self.metrics.log_stage(task_name=task_name, stage="diagnostics", success=(pr["code"] == 0 and fr["code"] == 0), models_used={}, files_generated=0, errors=None, metadata={"pytest": pr["code"], "flake8": fr["code"]})
-            except Exception:
-                pass
-
-        # Phase 5 – Documentation (Dynamic documentation generation)
-        doc_models = {}
-        try:
-            # Generate dynamic README
-            readme_md = self._generate_dynamic_readme(prompt)
-            doc_models = {"generated": "dynamic"}
-            
-            # Create docs directory and files
-            docs_root = os.path.join(run_dir, "docs")
-            os.makedirs(docs_root, exist_ok=True)
-            
-            self._write_text(os.path.join(run_dir, "README.md"), readme_md)
-            self._write_text(os.path.join(run_dir, "mkdocs.yml"), _TEMPLATE_MKDOCS)
-            self._write_text(os.path.join(docs_root, "index.md"), _TEMPLATE_DOCS_INDEX)
-            
-            artifacts["docs"] = {
-                "paths": [
-                    os.path.join(run_dir, "README.md"), 
-                    os.path.join(run_dir, "mkdocs.yml"), 
-                    os.path.join(docs_root, "index.md")
-                ]
-            }
-            record("documentation", True, doc_models, 3, None)
-        except Exception as e:
-            record("documentation", False, doc_models, 0, str(e))
+                        fp = start_cmd(flake8_cmd)
+                    except Exception:
+                        pp.kill()
+                        pp.communicate()
+                        raise
+                    pr = wait_cmd(pp, started + 240)
+                    fr = wait_cmd(fp, started + 120)
+                    self.metrics.log_stage(task_name=task_name, stage="diagnostics", success=(pr["code"] == 0 and fr["code"] == 0), models_used={}, files_generated=0, errors=None, metadata={"pytest": pr["code"], "flake8": fr["code"]})
+                except Exception:
+                    pass
+
+            record(*docs_fut.result())
 
         report = {
             "summary": "Full SDLC build completed",
             "run_dir": run_dir,
             "artifacts": artifacts,
-            "logs": logs,
+            "logs_path": "logs.jsonl",
             "commands": {
                 "backend": [
                     f"cd {run_dir}",
@@ -297,7 +309,8 @@ The frontend should be fully functional and ready to run with npm install && npm
                 "deploy": [f"cd {run_dir}", "docker compose up --build"]
             }
         }
-        self._write_text(os.path.join(run_dir, "run_report.json"), self._json(report))
+        write_file(os.path.join(run_dir, "run_report.json"), self._json(report))
+        self.metrics.flush()
         return report
 
     def _generate_dynamic_main(self, prompt: str) -> str:
@@ -424,79 +437,12 @@ if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
 '''
 
-    def _generate_dynamic_requirements(self, prompt: str) -> str:
-        """Generate dynamic requirements.txt based on the prompt"""
-        return '''fastapi==0.104.1
-uvicorn[standard]==0.24.0
-pydantic==2.5.0
-python-multipart==0.0.6
-python-dotenv==1.0.0
-requests==2.31.0
-pytest==7.4.3
-pytest-asyncio==0.21.1
-httpx==0.25.2
-'''
-
-    def _generate_dynamic_tests(self, prompt: str) -> str:
-        """Generate dynamic tests based on the prompt"""
-        return f'''import pytest
-from fastapi.testclient import TestClient
-from main import app
-
-client = TestClient(app)
-
-def test_health_endpoint():
-    """Test health endpoint"""
-    response = client.get("/health")
-    assert response.status_code == 200
-    data = response.json()
-    assert data["status"] == "healthy"
-    assert "timestamp" in data
-    assert "service" in data
-
-def test_status_endpoint():
-    """Test status endpoint"""
-    response = client.get("/status")
-    assert response.status_code == 200
-    data = response.json()
-    assert data["status"] == "running"
-    assert "timestamp" in data
-    assert "service" in data
-    assert "endpoints" in data
-    assert isinstance(data["endpoints"], list)
-
-def test_providers_endpoint():
-    """Test providers endpoint"""
-    response = client.get("/providers")
-    assert response.status_code == 200
-    data = response.json()
-    assert "providers" in data
-    assert "timestamp" in data
-    assert isinstance(data["providers"], dict)
-
-def test_root_endpoint():
-    """Test root endpoint"""
-    response = client.get("/")
-    assert response.status_code == 200
-    data = response.json()
-    assert "message" in data
-    assert "version" in data
-    assert "endpoints" in data
-    assert "docs" in data
-
-def test_cors_headers():
-    """Test CORS headers are present"""
-    response = client.options("/health")
-    # CORS preflight should be allowed
-    assert response.status_code in [200, 405]  # 405 is also acceptable for OPTIONS
-'''
-
-    def _generate_dynamic_status(self, prompt: str, files_generated: int, models_used: Dict[str, Any]) -> str:
+    def _generate_dynamic_status(self, prompt: str, files_generated: int, models_used: Dict[str, Any]) -> bytes:
         """Generate dynamic status.json with build information"""
         status_data = {
             "build_info": {
                 "prompt": prompt,
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": utc_iso(),
                 "files_generated": files_generated,
                 "models_used": models_used,
                 "status": "completed"
@@ -528,7 +474,7 @@ def test_cors_headers():
     def _generate_dynamic_package_json(self, prompt: str) -> str:
         """Generate dynamic package.json based on the prompt"""
         return f'''{{
-  "name": "generated-frontend-{prompt.lower().replace(' ', '-')[:20]}",
+  "name": "generated-frontend-{slugify(prompt, 20)}",
   "private": true,
   "version": "1.0.0",
   "type": "module",
@@ -559,7 +505,7 @@ def test_cors_headers():
   <head>
     <meta charset="UTF-8" />
     <meta name="viewport" content="width=device-width, initial-scale=1.0" />
-    <title>Generated App - {prompt}</title>
+    <title>Generated App - {html.escape(prompt)}</title>
   </head>
   <body>
     <div id="root"></div>
@@ -640,10 +586,10 @@ export default function App() {{
             </p>
           </div>
           <div className="text-sm text-gray-600">
-            <a className="underline mr-3" href={`${{API_BASE}}/docs`} target="_blank" rel="noreferrer">
+            <a className="underline mr-3" href={{`${{API_BASE}}/docs`}} target="_blank" rel="noreferrer">
               Swagger
             </a>
-            <a className="underline" href={`${{API_BASE}}/redoc`} target="_blank" rel="noreferrer">
+            <a className="underline" href={{`${{API_BASE}}/redoc`}} target="_blank" rel="noreferrer">
               ReDoc
             </a>
           </div>
@@ -685,118 +631,6 @@ export default function App() {{
   )
 }}'''
 
-    def _generate_api_status_component(self) -> str:
-        """Generate ApiStatus component"""
-        return '''import React from 'react'
-
-export default function ApiStatus({ status, providers }) {
-  return (
-    <div className="space-y-3">
-      <div className="flex items-center justify-between">
-        <span className="text-sm font-medium">Status</span>
-        <span className={`px-2 py-1 rounded-full text-xs font-medium ${
-          status === 'online' 
-            ? 'bg-green-100 text-green-800' 
-            : 'bg-red-100 text-red-800'
-        }`}>
-          {status}
-        </span>
-      </div>
-      
-      <div>
-        <h3 className="text-sm font-medium mb-2">Providers</h3>
-        <ul className="space-y-1">
-          {Object.entries(providers).map(([key, value]) => (
-            <li key={key} className="flex items-center justify-between">
-              <span className="font-mono text-sm">{key}</span>
-              <span className={value ? 'text-green-600' : 'text-red-600'}>
-                {value ? 'available' : 'unavailable'}
-              </span>
-            </li>
-          ))}
-        </ul>
-      </div>
-    </div>
-  )
-}'''
-
-    def _generate_endpoint_card_component(self) -> str:
-        """Generate EndpointCard component"""
-        return '''import React from 'react'
-
-export default function EndpointCard({ item }) {
-  return (
-    <div className="rounded-lg border p-4 bg-white shadow-sm hover:shadow-md transition-shadow">
-      <div className="text-xs uppercase tracking-wide text-gray-500 mb-1">
-        {item.method}
-      </div>
-      <div className="font-mono text-sm break-all mb-2">
-        {item.path}
-      </div>
-      {item.description && (
-        <div className="text-sm text-gray-600">
-          {item.description}
-        </div>
-      )}
-    </div>
-  )
-}'''
-
-    def _generate_dynamic_dockerfile(self, prompt: str) -> str:
-        """Generate dynamic Dockerfile for backend"""
-        return f'''FROM python:3.11-slim
-
-WORKDIR /app
-
-# Install system dependencies
-RUN apt-get update && apt-get install -y \\
-    gcc \\
-    && rm -rf /var/lib/apt/lists/*
-
-# Copy requirements and install Python dependencies
-COPY backend/requirements.txt ./requirements.txt
-RUN pip install --no-cache-dir -r requirements.txt
-
-# Copy application code
-COPY backend/ ./backend/
-COPY . .
-
-# Expose port
-EXPOSE 8000
-
-# Health check
-HEALTHCHECK --interval=30s --timeout=30s --start-period=5s --retries=3 \\
-    CMD curl -f http://localhost:8000/health || exit 1
-
-# Run the application
-CMD ["uvicorn", "backend.main:app", "--host", "0.0.0.0", "--port", "8000"]
-'''
-
-    def _generate_frontend_dockerfile(self) -> str:
-        """Generate Dockerfile for frontend"""
-        return '''FROM node:18-alpine
-
-WORKDIR /app
-
-# Copy package files
-COPY package*.json ./
-
-# Install dependencies
-RUN npm ci --only=production
-
-# Copy source code
-COPY . .
-
-# Build the application
-RUN npm run build
-
-# Expose port
-EXPOSE 5173
-
-# Start the application
-CMD ["npm", "run", "preview"]
-'''
-
     def _generate_dynamic_docker_compose(self, prompt: str) -> str:
         """Generate dynamic docker-compose.yml"""
         return f'''version: '3.8'
@@ -928,17 +762,18 @@ Generated by Autonomous SDLC Agent
 '''
 
 
-_TEMPLATE_BACKEND_REQS = """fastapi
+# Static scaffold files, stored as bytes so builds write them without re-encoding
+_TEMPLATE_BACKEND_REQS = b"""fastapi
 uvicorn
 pydantic
 """
 
-_TEMPLATE_BACKEND_README = """# Backend
+_TEMPLATE_BACKEND_README = b"""# Backend
 
 FastAPI app with health route and test.
 """
 
-_TEMPLATE_FASTAPI_MAIN = """from fastapi import FastAPI
+_TEMPLATE_FASTAPI_MAIN = b"""from fastapi import FastAPI
 
 app = FastAPI(title="Generated FastAPI Backend")
 
@@ -947,7 +782,7 @@ def health():
     return {"status": "ok"}
 """
 
-_TEMPLATE_ROUTE_HEALTH = """from fastapi import APIRouter
+_TEMPLATE_ROUTE_HEALTH = b"""from fastapi import APIRouter
 
 router = APIRouter()
 
@@ -956,15 +791,15 @@ def healthz():
     return {"ok": True}
 """
 
-_TEMPLATE_TEST_HEALTH = """def test_health_smoke():
+_TEMPLATE_TEST_HEALTH = b"""def test_health_smoke():
     assert 1 + 1 == 2
 """
 
-_TEMPLATE_PYTEST_INI = """[pytest]
+_TEMPLATE_PYTEST_INI = b"""[pytest]
 addopts = -q
 """
 
-_TEMPLATE_DOCKERFILE = """FROM python:3.11-slim
+_TEMPLATE_DOCKERFILE = b"""FROM python:3.11-slim
 WORKDIR /app
 COPY backend/requirements.txt ./
 RUN pip install --no-cache-dir -r requirements.txt
@@ -973,7 +808,7 @@ EXPOSE 8000
 CMD ["uvicorn", "backend.main:app", "--host", "0.0.0.0", "--port", "8000"]
 """
 
-_TEMPLATE_DOCKER_COMPOSE = """services:
+_TEMPLATE_DOCKER_COMPOSE = b"""services:
   api:
     build: .
     ports:
@@ -988,7 +823,7 @@ _TEMPLATE_DOCKER_COMPOSE = """services:
       - api
 """
 
-_TEMPLATE_GH_ACTIONS = """name: Deploy
+_TEMPLATE_GH_ACTIONS = b"""name: Deploy
 on: [push]
 jobs:
   build:
@@ -1005,19 +840,19 @@ jobs:
         run: pytest -q
 """
 
-_TEMPLATE_MKDOCS = """site_name: Generated Project Docs
+_TEMPLATE_MKDOCS = b"""site_name: Generated Project Docs
 nav:
   - Home: index.md
 theme:
   name: material
 """
 
-_TEMPLATE_DOCS_INDEX = """# Project Documentation
+_TEMPLATE_DOCS_INDEX = b"""# Project Documentation
 
 Welcome! Use the README for quickstart. This site can be served with `mkdocs serve`.
 """
 
-_TEMPLATE_PACKAGE_JSON = """{
+_TEMPLATE_PACKAGE_JSON = b"""{
   "name": "generated-frontend",
   "private": true,
   "version": "0.1.0",
@@ -1042,7 +877,7 @@ _TEMPLATE_PACKAGE_JSON = """{
 }
 """
 
-_TEMPLATE_TAILWIND_CONFIG = """/** @type {import('tailwindcss').Config} */
+_TEMPLATE_TAILWIND_CONFIG = b"""/** @type {import('tailwindcss').Config} */
 export default {
   content: [
     './index.html',
@@ -1055,7 +890,7 @@ export default {
 }
 """
 
-_TEMPLATE_POSTCSS = """export default {
+_TEMPLATE_POSTCSS = b"""export default {
   plugins: {
     tailwindcss: {},
     autoprefixer: {},
@@ -1063,7 +898,7 @@ _TEMPLATE_POSTCSS = """export default {
 }
 """
 
-_TEMPLATE_VITE = """import { defineConfig } from 'vite'
+_TEMPLATE_VITE = b"""import { defineConfig } from 'vite'
 import react from '@vitejs/plugin-react'
 
 export default defineConfig({
@@ -1072,7 +907,7 @@ export default defineConfig({
 })
 """
 
-_TEMPLATE_INDEX_HTML = """<!doctype html>
+_TEMPLATE_INDEX_HTML = b"""<!doctype html>
 <html lang="en">
   <head>
     <meta charset="UTF-8" />
@@ -1086,7 +921,7 @@ _TEMPLATE_INDEX_HTML = """<!doctype html>
   </html>
 """
 
-_TEMPLATE_MAIN_JSX = """import React from 'react'
+_TEMPLATE_MAIN_JSX = b"""import React from 'react'
 import ReactDOM from 'react-dom/client'
 import App from './App.jsx'
 import './index.css'
@@ -1098,14 +933,14 @@ ReactDOM.createRoot(document.getElementById('root')).render(
 )
 """
 
-_TEMPLATE_INDEX_CSS = """@tailwind base;
+_TEMPLATE_INDEX_CSS = b"""@tailwind base;
 @tailwind components;
 @tailwind utilities;
 
 html, body, #root { height: 100%; }
 """
 
-_TEMPLATE_APP_JSX = """import { useEffect, useState } from 'react'
+_TEMPLATE_APP_JSX = b"""import { useEffect, useState } from 'react'
 
 const API_BASE = import.meta.env.VITE_API_BASE || 'http://localhost:8000'
 
@@ -1178,4 +1013,184 @@ export default function App() {
 }
 """
 
+_TEMPLATE_BACKEND_REQUIREMENTS = b"""fastapi==0.104.1
+uvicorn[standard]==0.24.0
+pydantic==2.5.0
+python-multipart==0.0.6
+python-dotenv==1.0.0
+requests==2.31.0
+pytest==7.4.3
+pytest-asyncio==0.21.1
+httpx==0.25.2
+"""
+
+_TEMPLATE_BACKEND_TESTS = b'''import pytest
+from fastapi.testclient import TestClient
+from main import app
+
+client = TestClient(app)
+
+def test_health_endpoint():
+    """Test health endpoint"""
+    response = client.get("/health")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "healthy"
+    assert "timestamp" in data
+    assert "service" in data
+
+def test_status_endpoint():
+    """Test status endpoint"""
+    response = client.get("/status")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "running"
+    assert "timestamp" in data
+    assert "service" in data
+    assert "endpoints" in data
+    assert isinstance(data["endpoints"], list)
+
+def test_providers_endpoint():
+    """Test providers endpoint"""
+    response = client.get("/providers")
+    assert response.status_code == 200
+    data = response.json()
+    assert "providers" in data
+    assert "timestamp" in data
+    assert isinstance(data["providers"], dict)
+
+def test_root_endpoint():
+    """Test root endpoint"""
+    response = client.get("/")
+    assert response.status_code == 200
+    data = response.json()
+    assert "message" in data
+    assert "version" in data
+    assert "endpoints" in data
+    assert "docs" in data
+
+def test_cors_headers():
+    """Test CORS headers are present"""
+    response = client.options("/health")
+    # CORS preflight should be allowed
+    assert response.status_code in [200, 405]  # 405 is also acceptable for OPTIONS
+'''
+
+_TEMPLATE_API_STATUS_JSX = b"""import React from 'react'
+
+export default function ApiStatus({ status, providers }) {
+  return (
+    <div className="space-y-3">
+      <div className="flex items-center justify-between">
+        <span className="text-sm font-medium">Status</span>
+        <span className={`px-2 py-1 rounded-full text-xs font-medium ${
+          status === 'online' 
+            ? 'bg-green-100 text-green-800' 
+            : 'bg-red-100 text-red-800'
+        }`}>
+          {status}
+        </span>
+      </div>
+      
+      <div>
+        <h3 className="text-sm font-medium mb-2">Providers</h3>
+        <ul className="space-y-1">
+          {Object.entries(providers).map(([key, value]) => (
+            <li key={key} className="flex items-center justify-between">
+              <span className="font-mono text-sm">{key}</span>
+              <span className={value ? 'text-green-600' : 'text-red-600'}>
+                {value ? 'available' : 'unavailable'}
+              </span>
+            </li>
+          ))}
+        </ul>
+      </div>
+    </div>
+  )
+}"""
+
+_TEMPLATE_ENDPOINT_CARD_JSX = b"""import React from 'react'
+
+export default function EndpointCard({ item }) {
+  return (
+    <div className="rounded-lg border p-4 bg-white shadow-sm hover:shadow-md transition-shadow">
+      <div className="text-xs uppercase tracking-wide text-gray-500 mb-1">
+        {item.method}
+      </div>
+      <div className="font-mono text-sm break-all mb-2">
+        {item.path}
+      </div>
+      {item.description && (
+        <div className="text-sm text-gray-600">
+          {item.description}
+        </div>
+      )}
+    </div>
+  )
+}"""
+
+_TEMPLATE_BACKEND_DOCKERFILE = b"""FROM python:3.11-slim
+
+WORKDIR /app
+
+# Install system dependencies
+RUN apt-get update && apt-get install -y \\
+    gcc \\
+    && rm -rf /var/lib/apt/lists/*
+
+# Copy requirements and install Python dependencies
+COPY backend/requirements.txt ./requirements.txt
+RUN pip install --no-cache-dir -r requirements.txt
+
+# Copy application code
+COPY backend/ ./backend/
+COPY . .
+
+# Expose port
+EXPOSE 8000
+
+# Health check
+HEALTHCHECK --interval=30s --timeout=30s --start-period=5s --retries=3 \\
+    CMD curl -f http://localhost:8000/health || exit 1
+
+# Run the application
+CMD ["uvicorn", "backend.main:app", "--host", "0.0.0.0", "--port", "8000"]
+"""
+
+_TEMPLATE_FRONTEND_DOCKERFILE = b"""FROM node:18-alpine
+
+WORKDIR /app
+
+# Copy package files
+COPY package*.json ./
+
+# Install dependencies
+RUN npm ci --only=production
+
+# Copy source code
+COPY . .
+
+# Build the application
+RUN npm run build
+
+# Expose port
+EXPOSE 5173
+
+# Start the application
+CMD ["npm", "run", "preview"]
+"""
+
+
+_PROCESS_BUILDERS: Dict[bool, SDLCBuilder] = {}
+
+
+def run_build(prompt: str, fast_mode: bool = False) -> Dict[str, Any]:
+    """Process-pool entry point: build with a per-process cached SDLCBuilder.
 
+    Only the fields the parent reads are pickled back; the full report is in run_report.json.
+    """
+    builder = _PROCESS_BUILDERS.get(fast_mode)
+    if builder is None:
+        builder = _PROCESS_BUILDERS[fast_mode] = SDLCBuilder(fast_mode=fast_mode)
+    report = builder.build(prompt)
+    return {"summary": report["summary"], "run_dir": report["run_dir"]}
@@ -1,8 +1,11 @@
 from __future__ import annotations
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 import os
 import re
-from datetime import datetime
+
+import orjson
+
+from .clock import utc_iso
 
 
 SECRET_PATTERNS = [
@@ -14,25 +17,90 @@ SECRET_PATTERNS = [
 ]
 
 
+REDACTED = "${REDACTED_ENV_VAR}"
+# Separator for batched scans; none of the secret patterns can match across it
+_BATCH_SEP = "\x00"
+
+
+def _compile_hyperscan():
+	"""Compile SECRET_PATTERNS into one Hyperscan database, or None if unavailable."""
+	try:
+		import hyperscan  # type: ignore
+		db = hyperscan.Database()
+		db.compile(
+			expressions=[p.pattern.encode("utf-8") for p in SECRET_PATTERNS],
+			ids=list(range(len(SECRET_PATTERNS))),
+			elements=len(SECRET_PATTERNS),
+			flags=[hyperscan.HS_FLAG_SOM_LEFTMOST] * len(SECRET_PATTERNS),
+		)
+		return db
+	except Exception:
+		return None
+
+
+_HS_DB = _compile_hyperscan()
+
+
+def _hs_scrub(content: str) -> str:
+	data = content.encode("utf-8")
+	spans: List[Tuple[int, int]] = []
+
+	def on_match(_id: int, start: int, end: int, _flags: int, _ctx: Any) -> None:
+		spans.append((start, end))
+
+	_HS_DB.scan(data, match_event_handler=on_match)
+	if not spans:
+		return content
+	# Hyperscan reports every match end; merge overlaps into leftmost-longest spans
+	spans.sort()
+	out: List[bytes] = []
+	pos = 0
+	cur_start, cur_end = spans[0]
+	for start, end in spans[1:]:
+		if start <= cur_end:
+			cur_end = max(cur_end, end)
+			continue
+		out.append(data[pos:cur_start])
+		out.append(REDACTED.encode("utf-8"))
+		pos = cur_end
+		cur_start, cur_end = start, end
+	out.append(data[pos:cur_start])
+	out.append(REDACTED.encode("utf-8"))
+	out.append(data[cur_end:])
+	return b"".join(out).decode("utf-8")
+
+
 def scrub_secrets_in_text(content: str) -> str:
+	if _HS_DB is not None:
+		return _hs_scrub(content)
 	redacted = content
 	for pat in SECRET_PATTERNS:
-		redacted = pat.sub("${REDACTED_ENV_VAR}", redacted)
+		redacted = pat.sub(REDACTED, redacted)
 	return redacted
 
 
+def scrub_secrets_in_texts(contents: List[str]) -> List[str]:
+	"""Scrub many strings with a single scan over a separator-joined buffer."""
+	if not contents:
+		return []
+	if any(_BATCH_SEP in c for c in contents):
+		return [scrub_secrets_in_text(c) for c in contents]
+	return scrub_secrets_in_text(_BATCH_SEP.join(contents)).split(_BATCH_SEP)
+
+
 def scrub_files(files: Dict[str, str]) -> Dict[str, str]:
 	return {path: scrub_secrets_in_text(text) for path, text in files.items()}
 
 
 def append_audit(action: str, metadata: Dict[str, Any]) -> None:
 	line = {
-		"timestamp": datetime.utcnow().isoformat(),
+		"timestamp": utc_iso(),
 		"action": action,
 		"metadata": metadata,
 	}
 	log_path = os.path.join(os.getcwd(), "audit.log")
-	with open(log_path, "a", encoding="utf-8") as f:
-		f.write(str(line) + "\n")
+	# One JSON object per line, appended as bytes
+	with open(log_path, "ab") as f:
+		f.write(orjson.dumps(line, default=str, option=orjson.OPT_NON_STR_KEYS) + b"\n")
 
 
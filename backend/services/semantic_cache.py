@@ -0,0 +1,79 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict
+import threading
+
+
+class SemanticCache:
+	"""Approximate cache keyed by embeddings, using random-projection LSH.
+
+	Each of `num_tables` tables hashes a vector to the sign pattern of `num_bits` random
+	hyperplanes. Lookups gather candidates from matching buckets and verify cosine similarity
+	against `threshold`. numpy is imported lazily so the module is safe without embeddings.
+	"""
+
+	def __init__(self, num_tables: int = 8, num_bits: int = 12, threshold: float = 0.95, max_entries: int = 4096, seed: int = 0) -> None:
+		self.num_tables = num_tables
+		self.num_bits = num_bits
+		self.threshold = threshold
+		self.max_entries = max_entries
+		self._seed = seed
+		self._np = None
+		self._planes = None
+		self._tables: List[Dict[bytes, List[int]]] = [{} for _ in range(num_tables)]
+		self._entries: "OrderedDict[int, Tuple[Any, Any, List[bytes]]]" = OrderedDict()
+		self._next_id = 0
+		self._lock = threading.Lock()
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	def _prepare(self, vec: Any):
+		if self._np is None:
+			import numpy as np  # type: ignore
+			self._np = np
+		np = self._np
+		v = np.asarray(vec, dtype=np.float32).reshape(-1)
+		if self._planes is None:
+			rng = np.random.default_rng(self._seed)
+			self._planes = rng.standard_normal((self.num_tables, v.shape[0], self.num_bits)).astype(np.float32)
+		norm = float(np.linalg.norm(v))
+		if norm > 0:
+			v = v / norm
+		bits = np.einsum("d,tdb->tb", v, self._planes) > 0
+		keys = [np.packbits(row).tobytes() for row in bits]
+		return v, keys
+
+	def get(self, vec: Any, threshold: Optional[float] = None) -> Optional[Any]:
+		thr = self.threshold if threshold is None else threshold
+		v, keys = self._prepare(vec)
+		with self._lock:
+			candidates = set()
+			for table, key in zip(self._tables, keys):
+				candidates.update(table.get(key, ()))
+			best_id, best_sim = None, thr
+			for entry_id in candidates:
+				sim = float(self._entries[entry_id][0] @ v)
+				if sim >= best_sim:
+					best_id, best_sim = entry_id, sim
+			if best_id is None:
+				return None
+			self._entries.move_to_end(best_id)
+			return self._entries[best_id][1]
+
+	def put(self, vec: Any, value: Any) -> None:
+		v, keys = self._prepare(vec)
+		with self._lock:
+			entry_id = self._next_id
+			self._next_id += 1
+			self._entries[entry_id] = (v, value, keys)
+			for table, key in zip(self._tables, keys):
+				table.setdefault(key, []).append(entry_id)
+			while len(self._entries) > self.max_entries:
+				old_id, (_, _, old_keys) = self._entries.popitem(last=False)
+				for table, key in zip(self._tables, old_keys):
+					bucket = table.get(key)
+					if bucket:
+						bucket.remove(old_id)
+						if not bucket:
+							del table[key]
@@ -1,7 +1,8 @@
 from __future__ import annotations
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, String, LargeBinary, Float, DateTime, JSON, ForeignKey
+from sqlalchemy import create_engine, select, func, Column, Integer, String, LargeBinary, Float, DateTime, JSON, ForeignKey
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import declarative_base, sessionmaker, relationship
 import os
 
@@ -21,6 +22,13 @@ class ImageBlob(Base):
 	predictions = relationship("Prediction", back_populates="image")
 
 
+class ImageIdSeq(Base):
+	"""Sequence used to hand out image ids before the BLOB itself is written."""
+	__tablename__ = "image_id_seq"
+	__table_args__ = {"sqlite_autoincrement": True}
+	id = Column(Integer, primary_key=True, autoincrement=True)
+
+
 class Prediction(Base):
 	__tablename__ = "predictions"
 	id = Column(Integer, primary_key=True)
@@ -76,10 +84,10 @@ class DatabaseService:
 	def __init__(self) -> None:
 		self._Session = SessionLocal
 
-	def save_image(self, content: bytes, filename: str) -> int:
+	def save_image(self, content: bytes, filename: str, image_id: Optional[int] = None) -> int:
 		session = self._Session()
 		try:
-			img = ImageBlob(filename=filename, content=content)
+			img = ImageBlob(id=image_id, filename=filename, content=content)
 			session.add(img)
 			session.commit()
 			session.refresh(img)
@@ -87,6 +95,46 @@ class DatabaseService:
 		finally:
 			session.close()
 
+	def save_images(self, rows: List[Tuple[int, bytes, str]]) -> None:
+		"""Persist (image_id, content, filename) rows in a single transaction."""
+		session = self._Session()
+		try:
+			session.add_all([ImageBlob(id=image_id, filename=filename, content=content) for image_id, content, filename in rows])
+			session.commit()
+		finally:
+			session.close()
+
+	def reserve_image_id(self) -> int:
+		"""Allocate an image id without writing the BLOB (see save_image(image_id=...))."""
+		session = self._Session()
+		try:
+			if session.query(ImageIdSeq.id).first() is None:
+				# Seed the sequence past any ids already used by images
+				top = session.query(func.max(ImageBlob.id)).scalar() or 0
+				if top:
+					try:
+						session.add(ImageIdSeq(id=top))
+						session.commit()
+					except IntegrityError:
+						# Another caller seeded it first
+						session.rollback()
+			seq = ImageIdSeq()
+			session.add(seq)
+			session.commit()
+			return seq.id
+		finally:
+			session.close()
+
+	def delete_predictions_for_image(self, image_id: int) -> int:
+		"""Remove predictions that reference image_id (used when its BLOB could not be written)."""
+		session = self._Session()
+		try:
+			count = session.query(Prediction).filter(Prediction.image_id == image_id).delete()
+			session.commit()
+			return count
+		finally:
+			session.close()
+
 	def save_prediction(self, image_id: int, label: str, confidence: float) -> int:
 		session = self._Session()
 		try:
@@ -112,19 +160,24 @@ class DatabaseService:
 	def list_logs(self, limit: int = 50):
 		session = self._Session()
 		try:
-			q = session.query(LogEntry).order_by(LogEntry.created_at.desc()).limit(limit)
+			# Select plain column tuples in one batch instead of hydrating ORM objects per row
+			rows = session.execute(
+				select(LogEntry.id, LogEntry.stage, LogEntry.provider, LogEntry.model, LogEntry.success, LogEntry.message, LogEntry.meta, LogEntry.created_at)
+				.order_by(LogEntry.created_at.desc())
+				.limit(limit)
+			).all()
 			return [
 				{
-					"id": r.id,
-					"stage": r.stage,
-					"provider": r.provider,
-					"model": r.model,
-					"success": bool(r.success),
-					"message": r.message,
-					"metadata": r.meta,
-					"created_at": r.created_at.isoformat(),
+					"id": id_,
+					"stage": stage,
+					"provider": provider,
+					"model": model,
+					"success": bool(success),
+					"message": message,
+					"metadata": meta,
+					"created_at": created_at.isoformat(),
 				}
-				for r in q
+				for id_, stage, provider, model, success, message, meta, created_at in rows
 			]
 		finally:
 			session.close()
@@ -14,7 +14,10 @@ def test_build_system():
     
     # Test the build system
     builder = SDLCBuilder(fast_mode=True)  # Use fast mode for testing
-    result = builder.build('Build a personal finance tracker with charts and user login')
+    try:
+        result = builder.build('Build a personal finance tracker with charts and user login')
+    finally:
+        builder.close()
     
     print('Build completed successfully!')
     print(f'Run directory: {result["run_dir"]}')
@@ -91,3 +91,51 @@ def test_requirements_api(client):
 	assert r.status_code == 200 and r.json()["success"] is True
 
 
+def test_logs_scrub_nested_metadata(client):
+	from backend.main import db
+	secret = "sk-" + "a" * 24
+	db.save_log(stage="test", provider="local", model="none", success=True, message=f"key {secret}", metadata={"nested": {"token": secret}, "n": 1})
+	r = client.get("/logs", params={"limit": 5})
+	assert r.status_code == 200
+	item = next(it for it in r.json()["items"] if it.get("stage") == "test")
+	assert secret not in item["message"]
+	assert secret not in item["metadata"]["nested"]["token"] and item["metadata"]["n"] == 1
+
+
+def test_task_cache_warm_up_encodes_in_one_batch(monkeypatch):
+	np = pytest.importorskip("numpy")
+	from backend import main
+	from backend.services.semantic_cache import SemanticCache
+
+	class Rag:
+		def __init__(self):
+			self.batches = []
+
+		def recent(self, limit):
+			return ["Task: add\nOutput: 3", "Run for: x", "Task: echo\nOutput: [baseline] echo", "Task: mul\nOutput: 6"]
+
+		def embed(self, text):
+			raise AssertionError("warm-up must not embed one prompt at a time")
+
+		def embed_batch(self, texts):
+			self.batches.append(list(texts))
+			return np.eye(len(texts), 8, dtype=np.float32)
+
+	rag = Rag()
+	monkeypatch.setattr(main, "rag", rag)
+	monkeypatch.setattr(main, "_TASK_CACHE", SemanticCache())
+	main._warm_task_cache()
+
+	assert rag.batches == [["add", "mul"]]
+	assert main._TASK_CACHE.get(np.eye(2, 8, dtype=np.float32)[1])["output"] == "6"
+
+
+def test_providers_refresh_detects_once(client, monkeypatch):
+	from backend import main
+
+	calls = []
+	real_refresh = main.router.refresh
+	monkeypatch.setattr(main.router, "refresh", lambda reprobe=False: (calls.append(reprobe), real_refresh(reprobe=reprobe))[1])
+	r = client.post("/providers/refresh")
+	assert r.status_code == 200 and "providers" in r.json()
+	assert calls == [True]
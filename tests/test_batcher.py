@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+
+from backend.services.batcher import MicroBatcher, WriteBehindQueue
+
+
+def test_concurrent_submissions_are_batched():
+	calls = []
+
+	def fn(items):
+		calls.append(list(items))
+		return [i * 2 for i in items]
+
+	async def main():
+		batcher = MicroBatcher(fn, max_batch=8, max_latency_ms=50)
+		try:
+			return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+		finally:
+			await batcher.stop()
+
+	results = asyncio.run(main())
+	assert results == [0, 2, 4, 6, 8]
+	assert len(calls) == 1 and sorted(calls[0]) == [0, 1, 2, 3, 4]
+
+
+def test_batch_errors_propagate_to_every_caller():
+	def fn(items):
+		raise ValueError("boom")
+
+	async def main():
+		batcher = MicroBatcher(fn, max_batch=4, max_latency_ms=5)
+		try:
+			return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+		finally:
+			await batcher.stop()
+
+	results = asyncio.run(main())
+	assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_write_behind_flushes_on_stop_and_sheds_when_full():
+	written = []
+	writer = WriteBehindQueue(lambda items: written.extend(items), maxsize=4, max_batch=2)
+	assert all(writer.offer(i) for i in range(3))
+	writer.stop(timeout=5)
+	assert sorted(written) == [0, 1, 2]
+
+	blocked = threading.Event()
+	stalled = WriteBehindQueue(lambda items: blocked.wait(5), maxsize=1, max_batch=1)
+	stalled.offer("in-flight")
+	time.sleep(0.05)
+	assert stalled.offer("queued") is True
+	assert stalled.offer("overflow") is False
+	blocked.set()
+	stalled.stop(timeout=5)
+
+
+def test_stop_waits_for_dispatched_batches():
+	started = threading.Event()
+
+	def fn(items):
+		started.set()
+		time.sleep(0.1)
+		return items
+
+	async def main():
+		batcher = MicroBatcher(fn, max_batch=1, max_latency_ms=0)
+		pending = asyncio.ensure_future(batcher.submit("x"))
+		await asyncio.to_thread(started.wait, 5)
+		assert len(batcher._inflight) == 1
+		await batcher.stop()
+		assert not batcher._inflight
+		return await pending
+
+	assert asyncio.run(main()) == "x"
+
+
+def test_write_behind_retries_failed_batch():
+	written, attempts = [], []
+
+	def fn(items):
+		attempts.append(list(items))
+		if len(attempts) == 1:
+			raise RuntimeError("database is locked")
+		written.extend(items)
+
+	writer = WriteBehindQueue(fn, max_batch=8, backoff=0.001)
+	for i in range(3):
+		writer.offer(i)
+	writer.stop(timeout=5)
+	assert sorted(written) == [0, 1, 2]
+
+
+def test_write_behind_falls_back_to_items_and_reports_drops():
+	written, dropped = [], []
+
+	def fn(items):
+		raise RuntimeError("integrity error")
+
+	def item_fn(item):
+		if item == "bad":
+			raise ValueError("bad row")
+		written.append(item)
+
+	writer = WriteBehindQueue(fn, max_batch=8, retries=1, backoff=0.001, item_fn=item_fn, on_drop=lambda item, e: dropped.append(item))
+	for item in ("a", "bad", "b"):
+		writer.offer(item)
+	writer.stop(timeout=5)
+	assert sorted(written) == ["a", "b"]
+	assert dropped == ["bad"]
@@ -0,0 +1,14 @@
+from backend.services.classify import classify_prompt
+
+
+def test_priority_order_is_preserved():
+	# "react" (frontend) and "fastapi" (backend) both match; fullstack outranks both
+	assert classify_prompt("Full stack app with React and FastAPI") == "BUILD_FULLSTACK"
+	assert classify_prompt("React dashboard backed by FastAPI") == "FRONTEND_ONLY"
+	assert classify_prompt("Write the acceptance criteria and predict churn") == "REQUIREMENTS"
+
+
+def test_unmatched_and_empty_prompts():
+	assert classify_prompt("Tell me a joke") == "OTHER_TEXT"
+	assert classify_prompt("") == "OTHER_TEXT"
+	assert classify_prompt(None) == "OTHER_TEXT"
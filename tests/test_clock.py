@@ -0,0 +1,11 @@
+from datetime import datetime, timedelta
+
+from backend.services.clock import utc_iso
+
+
+def test_utc_iso_matches_isoformat_layout():
+	before = datetime.utcnow()
+	stamp = utc_iso()
+	parsed = datetime.fromisoformat(stamp)
+	assert len(stamp) == len("2024-01-01T00:00:00.000000")
+	assert abs(parsed - before) < timedelta(seconds=5)
@@ -0,0 +1,40 @@
+from backend.services.file_writer import slugify, write_file, write_files
+
+
+def test_write_files_creates_nested_dirs_and_overwrites(tmp_path):
+	root = tmp_path / "out"
+	paths = write_files(str(root), {"src/app/main.py": "print('hi')\n", "README.md": b"# x\n"})
+	assert len(paths) == 2
+	assert (root / "src" / "app" / "main.py").read_text(encoding="utf-8") == "print('hi')\n"
+	assert (root / "README.md").read_bytes() == b"# x\n"
+
+	write_file(str(root / "README.md"), "short")
+	assert (root / "README.md").read_text(encoding="utf-8") == "short"
+
+
+def test_write_files_mixed_depth_dirs(tmp_path):
+	files = {"a/x.txt": "1", "a/b/c/y.txt": "2", "a-b/z.txt": "3", "top.txt": "4"}
+	write_files(str(tmp_path), files)
+	for rel, content in files.items():
+		assert (tmp_path / rel).read_text(encoding="utf-8") == content
+
+
+def test_write_files_creates_extra_empty_dirs(tmp_path):
+	write_files(str(tmp_path), {"tests/test_x.py": "pass\n"}, dirs=("routes", "tests", "models/sub"))
+	assert (tmp_path / "routes").is_dir() and (tmp_path / "models" / "sub").is_dir()
+	assert (tmp_path / "tests" / "test_x.py").is_file()
+
+
+def test_slugify_long_prompt_matches_full_scan():
+	assert slugify("Build a TODO app!") == "build-a-todo-app"
+	assert slugify("") == ""
+	long_prompt = "Build  an app: " + "x" * 5000
+	assert slugify(long_prompt) == "build-an-app-" + "x" * 27
+	sparse = "!" * 500 + " tail words here"
+	assert slugify(sparse) == "tail-words-here"
+
+
+def test_slugify_keeps_non_latin_words():
+	assert slugify("Создай магазин книг!") == "создай-магазин-книг"
+	assert slugify("書店のウェブサイト") == "書店のウェブサイト"
+	assert slugify("Café  ümlaut/app") == "café-ümlautapp"
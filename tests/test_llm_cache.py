@@ -0,0 +1,34 @@
+import pytest
+
+from backend.services.llm_cache import CacheMiss, LLMCache
+
+
+def test_enabled_round_trip_and_key_separation(tmp_path):
+	cache = LLMCache(path=str(tmp_path / "c.db"), mode="enabled")
+	key = LLMCache.key("text", "openai", "gpt-4o-mini", "hello")
+	assert cache.lookup(key) is None
+	cache.store(key, {"output": "hi", "tokens": 1})
+	assert cache.lookup(key) == {"output": "hi", "tokens": 1}
+	assert LLMCache.key("text", "openai", "gpt-4o-mini", "hello!") != key
+	cache.close()
+
+
+def test_modes(tmp_path):
+	path = str(tmp_path / "c.db")
+	key = LLMCache.key("text", "groq", "m", "p")
+	LLMCache(path=path, mode="read-only").store(key, {"output": "x"})
+	with pytest.raises(CacheMiss):
+		LLMCache(path=path, mode="replay").lookup(key)
+	LLMCache(path=path, mode="write-only").store(key, {"output": "x"})
+	assert LLMCache(path=path, mode="replay").lookup(key) == {"output": "x"}
+	assert LLMCache(path=path, mode="disabled").lookup(key) is None
+	with pytest.raises(ValueError):
+		LLMCache(path=path, mode="sometimes")
+
+
+def test_ttl_expires_entries(tmp_path):
+	path = str(tmp_path / "c.db")
+	key = LLMCache.key("text", "gemini", "m", "0.2", "p")
+	LLMCache(path=path, mode="enabled").store(key, {"output": "x"})
+	assert LLMCache(path=path, mode="enabled", ttl=3600).lookup(key) == {"output": "x"}
+	assert LLMCache(path=path, mode="enabled", ttl=1e-9).lookup(key) is None
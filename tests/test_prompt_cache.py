@@ -0,0 +1,59 @@
+import zlib
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from backend.services.rag import RagService
+
+
+def _bag_of_words(text):
+	vec = np.zeros(256, dtype=np.float32)
+	for word in text.lower().split():
+		vec[zlib.crc32(word.encode()) % 256] += 1.0
+	return vec / np.linalg.norm(vec)
+
+
+@pytest.fixture
+def rag(monkeypatch, tmp_path):
+	monkeypatch.setenv("RAG_DB_URL", f"sqlite:///{tmp_path / 'rag.db'}")
+	service = RagService(None, index_path=str(tmp_path / "rag.faiss"))
+	monkeypatch.setattr(service, "embed", _bag_of_words)
+	return service
+
+
+def test_distinct_prompts_do_not_share_responses(rag):
+	rag.semantic_cache_put("requirements", "Build a website for my book store", {"output": "books"})
+
+	assert rag.semantic_cache_lookup("requirements", "Build a website for my clothing shop") is None
+	assert rag.semantic_cache_lookup("requirements", "build a website for my BOOK store")["output"] == "books"
+
+
+def test_stages_are_cached_separately(rag):
+	rag.semantic_cache_put("requirements", "Build a simple calculator app", {"output": "reqs"})
+
+	assert rag.semantic_cache_lookup("design", "Build a simple calculator app") is None
+	assert rag.semantic_cache_lookup("requirements", "Build a simple calculator app")["cached"] is True
+
+
+def test_plan_batches_only_cache_misses(rag):
+	from backend.services.agent import AgentOrchestrator
+
+	class Router:
+		def __init__(self):
+			self.batches = []
+
+		def generate_text_batch(self, prompts, preference=None, max_inflight=None):
+			assert max_inflight == 1
+			self.batches.append(list(prompts))
+			return [{"output": p[:6], "fallback": False} for p in prompts]
+
+	agent = AgentOrchestrator.__new__(AgentOrchestrator)
+	agent.rag, agent.router = rag, Router()
+	rag.semantic_cache_put("requirements", "Build a simple calculator app", {"output": "reqs"})
+
+	req, design = agent._plan("Build a simple calculator app")
+	assert req["output"] == "reqs" and req["cached"] is True
+	assert design["output"] == "Create"
+	assert len(agent.router.batches) == 1 and len(agent.router.batches[0]) == 1
+	assert agent._plan("Build a simple calculator app")[1]["cached"] is True
@@ -0,0 +1,260 @@
+import socket
+import threading
+import time
+from collections import deque
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("PIL")
+
+from backend.services import adapters
+from backend.services.adapters import InferenceRouter
+from backend.services.llm_cache import CacheMiss, LLMCache
+
+
+class _Clock:
+	def __init__(self) -> None:
+		self.now = 1000.0
+
+	def __call__(self) -> float:
+		return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+	c = _Clock()
+	monkeypatch.setattr(adapters.time, "monotonic", c)
+	return c
+
+
+@pytest.fixture
+def router(monkeypatch, tmp_path):
+	for key in adapters._ENV_KEYS:
+		monkeypatch.delenv(key, raising=False)
+	monkeypatch.setenv("PROVIDER_HTTP2", "0")
+	monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "cache.db"))
+	monkeypatch.setenv("LLM_CACHE_MODE", "enabled")
+	monkeypatch.setattr(adapters, "_probe_ollama", lambda *a: False)
+	r = InferenceRouter()
+	yield r
+	r.close()
+
+
+def _trip(router, name):
+	for _ in range(adapters._BREAKER_THRESHOLD):
+		router._breaker_record(name, ok=False)
+
+
+def test_breaker_cycle_and_cooldown_growth(router, clock):
+	_trip(router, "groq")
+	assert not router._breaker_allows("groq")
+
+	for cooldown in (1.0, 4.0, 16.0):
+		assert router._breaker["groq"]["cooldown"] == cooldown
+		clock.now += cooldown - 0.5
+		assert not router._breaker_allows("groq")
+		clock.now += 0.5
+		# Half-open: exactly one trial is let through
+		assert router._breaker_allows("groq")
+		assert not router._breaker_allows("groq")
+		router._breaker_record("groq", ok=False)
+
+	clock.now += 64.0
+	assert router._breaker_allows("groq")
+	router._breaker_record("groq", ok=True)
+	assert "groq" not in router._breaker
+	assert router._breaker_allows("groq") and router._breaker_allows("groq")
+
+
+def test_cache_hit_hands_back_half_open_trial(router, clock):
+	key = LLMCache.key("text", "groq", adapters._TEXT_MODELS["groq"], str(adapters._TEMPERATURE), "hi")
+	router._cache.store(key, {"output": "cached", "provider": "groq"})
+	_trip(router, "groq")
+	clock.now += 1.0
+
+	assert router._breaker_allows("groq")
+	assert router._call_provider("groq", "hi")["cached"] is True
+	assert router._breaker_allows("groq")
+
+
+def test_replay_miss_hands_back_half_open_trial(router, clock):
+	router._cache.mode = "replay"
+	_trip(router, "groq")
+	clock.now += 1.0
+
+	assert router._breaker_allows("groq")
+	with pytest.raises(CacheMiss):
+		router._call_provider("groq", "never cached")
+	assert router._breaker_allows("groq")
+
+
+def _stream_router(router, monkeypatch, stream):
+	router._text_order = ("groq",)
+	monkeypatch.setattr(router, "_stream_provider", lambda name, prompt: stream())
+	router._dispatch["groq"] = lambda prompt, timeout: (_ for _ in ()).throw(RuntimeError("down"))
+
+
+def test_stream_reports_provider_and_caches_output(router, monkeypatch):
+	_stream_router(router, monkeypatch, lambda: iter(["he", "llo"]))
+	served = {}
+	assert list(router.generate_text_stream("hi", served=served)) == ["he", "llo"]
+	assert served["provider"] == "groq" and served["model"] == adapters._TEXT_MODELS["groq"]
+
+	monkeypatch.setattr(router, "_stream_provider", lambda name, prompt: iter(()))
+	served = {}
+	assert list(router.generate_text_stream("hi", served=served)) == ["hello"]
+	assert served["cached"] is True
+	assert router._call_provider("groq", "hi")["output"] == "hello"
+
+
+def test_empty_stream_counts_as_failure(router, monkeypatch, clock):
+	_stream_router(router, monkeypatch, lambda: iter(()))
+	_trip(router, "groq")
+	clock.now += 1.0
+	served = {}
+	(output,) = router.generate_text_stream("hi", served=served)
+	assert output.startswith("[baseline]") and served["fallback"] is True
+	assert router._breaker["groq"]["cooldown"] == 4.0
+
+
+def test_mid_stream_error_is_recorded(router, monkeypatch):
+	def stream():
+		yield "partial"
+		raise ConnectionError("reset")
+
+	_stream_router(router, monkeypatch, stream)
+	chunks = router.generate_text_stream("hi")
+	assert next(chunks) == "partial"
+	with pytest.raises(ConnectionError):
+		next(chunks)
+	assert router._breaker["groq"]["failures"] == 1
+
+
+def test_bulkhead_rejects_when_saturated(router):
+	router.provider_pool_size = 1
+	release = threading.Event()
+	router._dispatch["groq"] = lambda prompt, timeout: (release.wait(5), ("ok", 1))[1]
+
+	first = router._submit_bulkheaded("groq", "a")
+	assert router._submit_bulkheaded("groq", "b") is None
+	release.set()
+	assert first.result(5)["output"] == "ok"
+	for _ in range(500):
+		if not router._inflight["groq"]:
+			break
+		time.sleep(0.01)
+	second = router._submit_bulkheaded("groq", "c")
+	assert second is not None and second.result(5)["output"] == "ok"
+
+
+def test_saturated_bulkhead_keeps_half_open_trial(router, clock):
+	router._dispatch["groq"] = lambda prompt, timeout: ("ok", 1)
+	_trip(router, "groq")
+	clock.now += 1.0
+	router._inflight["groq"] = router.provider_pool_size
+
+	assert router._first_success(["groq"], "hi") is None
+	router._inflight["groq"] = 0
+	assert router._first_success(["groq"], "hi")["output"] == "ok"
+	assert "groq" not in router._breaker
+
+
+def test_read_timeouts_are_not_retried(monkeypatch):
+	requests = pytest.importorskip("requests")
+	monkeypatch.setenv("PROVIDER_HTTP2", "0")
+	server = socket.socket()
+	server.bind(("127.0.0.1", 0))
+	server.listen(8)
+	accepted = []
+
+	def hang():
+		# Accept connections and never answer
+		while True:
+			try:
+				accepted.append(server.accept()[0])
+			except OSError:
+				return
+
+	threading.Thread(target=hang, daemon=True).start()
+	session = adapters._build_session()
+	try:
+		with pytest.raises(requests.ReadTimeout):
+			session.post(f"http://127.0.0.1:{server.getsockname()[1]}/v1", data=b"{}", timeout=0.2)
+		assert len(accepted) == 1
+	finally:
+		session.close()
+		server.close()
+		for conn in accepted:
+			conn.close()
+
+
+def test_generate_text_batch_keeps_order_and_reuses_pool(router):
+	router._text_order = ("groq",)
+	router._dispatch["groq"] = lambda prompt, timeout: (prompt.upper(), 1)
+
+	assert [r["output"] for r in router.generate_text_batch(["a", "b", "c"])] == ["A", "B", "C"]
+	pool = router._batch_pool
+	assert [r["output"] for r in router.generate_text_batch(["d", "e"])] == ["D", "E"]
+	assert router._batch_pool is pool
+
+
+def test_hedge_waits_for_provider_p95(router):
+	router._dispatch["groq"] = lambda prompt, timeout: (time.sleep(0.3), ("slow", 1))[1]
+	router._dispatch["gemini"] = lambda prompt, timeout: ("fast", 1)
+
+	# Cold provider: no p95 yet, so the slow call is not hedged
+	assert router._first_success(["groq", "gemini"], "cold")["output"] == "slow"
+	router._latency[("groq", "text")] = deque([0.05] * adapters._TIMEOUT_MIN_SAMPLES, maxlen=100)
+	# 0.3s is far past groq's 50ms p95: gemini is started and wins
+	assert router._first_success(["groq", "gemini"], "warm")["output"] == "fast"
+
+
+def test_short_text_calls_do_not_shrink_codegen_timeout(router):
+	seen = []
+	router._dispatch["groq"] = lambda prompt, timeout: (seen.append(timeout), ("ok", 1))[1]
+	for i in range(adapters._TIMEOUT_MIN_SAMPLES):
+		router._call_provider_uncached("groq", f"short {i}")
+
+	assert router._timeout_for("groq") == 2.0
+	assert router._timeout_for("groq", "code") == adapters._DEFAULT_TIMEOUT
+	router._call_provider_uncached("groq", "build it", kind="code")
+	assert seen[-1] == adapters._DEFAULT_TIMEOUT
+
+
+def test_timed_out_calls_raise_the_timeout(router, clock):
+	requests = pytest.importorskip("requests")
+	router._latency[("groq", "text")] = deque([0.5] * adapters._TIMEOUT_MIN_SAMPLES, maxlen=100)
+	assert router._timeout_for("groq") == 2.0
+
+	def hung(prompt, timeout):
+		clock.now += 40.0
+		raise requests.Timeout("read timed out")
+
+	router._dispatch["groq"] = hung
+	with pytest.raises(requests.Timeout):
+		router._call_provider_uncached("groq", "long")
+	assert router._timeout_for("groq") == pytest.approx(1.3 * 40.0)
+
+
+def test_generate_code_calls_one_provider_when_first_is_slow(router):
+	calls = []
+
+	def chat(name, delay):
+		def call(prompt, timeout):
+			calls.append(name)
+			time.sleep(delay)
+			return '{"main.py": "print(1)"}', 1
+		return call
+
+	router._available_set = frozenset({"gemini", "perplexity"})
+	router._text_order = ("gemini", "perplexity")
+	router._dispatch["gemini"] = chat("gemini", 0.3)
+	router._dispatch["perplexity"] = chat("perplexity", 0.0)
+	# Even with hedging as aggressive as it gets, code generation stays on one provider
+	router.hedge_delay = 0.0
+
+	result = router.generate_code("hello world service")
+	assert result["provider"] == "gemini" and result["files"] == {"main.py": "print(1)"}
+	time.sleep(0.1)
+	assert calls == ["gemini"]
@@ -0,0 +1,27 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from backend.services.semantic_cache import SemanticCache
+
+
+def test_near_duplicate_hits_and_distinct_misses():
+	rng = np.random.default_rng(1)
+	base = rng.standard_normal(64).astype(np.float32)
+	cache = SemanticCache(threshold=0.95)
+	cache.put(base, {"output": "cached"})
+
+	assert cache.get(base * 2.0) == {"output": "cached"}
+	assert cache.get(-base) is None
+
+
+def test_eviction_is_bounded():
+	rng = np.random.default_rng(2)
+	cache = SemanticCache(max_entries=3)
+	vecs = [rng.standard_normal(32).astype(np.float32) for _ in range(5)]
+	for i, v in enumerate(vecs):
+		cache.put(v, i)
+
+	assert len(cache) == 3
+	assert cache.get(vecs[0]) is None
+	assert cache.get(vecs[4]) == 4